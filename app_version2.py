@@ -1,73 +1,21 @@
 import streamlit as st
-from crewai import Agent, Task, Crew, Process
-from langchain_community.tools.google_trends import GoogleTrendsQueryRun
-from langchain_community.utilities.google_trends import GoogleTrendsAPIWrapper
-from langchain_openai import ChatOpenAI
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool
-from tools.semrush_keyword import SemrushKeyWordTools
-from tools.semrush_tools import SemrushTools
+from brief_pipeline import BRIEF_PROCESS, BRIEF_PROCESSES, BriefEngine
+from llm_cache import LLM_CACHE_MODE, LLM_CACHE_MODES
+from batch import load_batch_csv, run_batch
+from brief_models import task_markdown
+from job_queue import JobQueue
+from worker_pool import POOL_WORKERS, BriefWorkerPool, run_in_thread
+from log_stream import StreamToExpander, TaskSections
 import re
+import subprocess
 import sys
 import os
 from dotenv import load_dotenv
-from langchain_anthropic import ChatAnthropic
-import docx
-import requests
-import csv
-
 from datetime import datetime
-
-# Ensure the results directory exists
-if not os.path.exists("Results"):
-    os.makedirs("Results")
-    
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+import time
 
 load_dotenv()
 
-def setup_llm(llm_option):
-    if llm_option == 'OpenAI GPT-4o':
-        api_key = os.getenv('OPENAI_API_KEY')
-        return ChatOpenAI(model="gpt-4o", api_key=api_key)
-    else:
-        api_key = os.getenv('CLAUDE_API_KEY')
-        return ChatAnthropic(model="claude-3-haiku-20240307", api_key=api_key)
-
-def fetch_related_keywords(api_key, phrase, lang):
-    url = f"https://api.semrush.com/?type=phrase_related&key={api_key}&phrase={phrase}&export_columns=Ph,Nq,Nr,Td,Rr&database={lang}&display_limit=10&display_sort=nq_desc&display_filter=%2B|Nq|Lt|1000"
-    response = requests.get(url)
-    try:
-        response.raise_for_status()
-        csv_content = response.text.splitlines()
-        reader = csv.DictReader(csv_content, delimiter=';')
-        return [row for row in reader]
-    except requests.exceptions.HTTPError as http_err:
-        st.error(f"HTTP error occurred: {http_err}")
-    except requests.exceptions.RequestException as req_err:
-        st.error(f"Request error occurred: {req_err}")
-    except Exception as e:
-        st.error(f"Error parsing CSV response for related keywords: {e}")
-        st.write("Raw response:", response.text)
-    return []
-
-# Function to fetch and parse QA from SEMrush API
-def fetch_qa(api_key, phrase, lang):
-    url = f"https://api.semrush.com/?type=phrase_questions&key={api_key}&phrase={phrase}&export_columns=Ph,Nq,Nr,Td&database={lang}&display_limit=10&display_sort=nq_desc&display_filter=%2B|Nq|Lt|1000"
-    response = requests.get(url)
-    try:
-        response.raise_for_status()
-        csv_content = response.text.splitlines()
-        reader = csv.DictReader(csv_content, delimiter=';')
-        return [row for row in reader]
-    except requests.exceptions.HTTPError as http_err:
-        st.error(f"HTTP error occurred: {http_err}")
-    except requests.exceptions.RequestException as req_err:
-        st.error(f"Request error occurred: {req_err}")
-    except Exception as e:
-        st.error(f"Error parsing CSV response for QA data: {e}")
-        st.write("Raw response:", response.text)
-    return []
-
 
 st.title("SEO Briefing Generator")
 
@@ -78,34 +26,150 @@ is_german = language == "Deutsch"
 llm_options = ['OpenAI GPT-4o', 'Claude-3', 'Groq']
 llm_choice = st.selectbox("Select the LLM to use:", llm_options)
 
-llm = setup_llm(llm_choice)
-
-google_search = SerperDevTool()
-website_scrapper = ScrapeWebsiteTool()
-google_trends_api_wrapper = GoogleTrendsAPIWrapper()
-google_trends_tool = GoogleTrendsQueryRun(api_wrapper=google_trends_api_wrapper)
-
 
-class StreamToExpander:
-    def __init__(self, expander, buffer_limit=10000):
-        self.expander = expander
-        self.buffer = []
-        self.buffer_limit = buffer_limit
 
-    def write(self, data):
-        cleaned_data = re.sub(r'\x1B\[\d+;?\d*m', '', data)
-        if len(self.buffer) >= self.buffer_limit:
-            self.buffer.pop(0)
-        self.buffer.append(cleaned_data)
+@st.cache_resource
+def load_engine(llm_choice, llm_cache_mode):
+    return BriefEngine(llm_choice, llm_cache_mode=llm_cache_mode)
+
+
+llm_cache_mode = st.sidebar.selectbox(
+    "LLM response cache", LLM_CACHE_MODES, index=LLM_CACHE_MODES.index(LLM_CACHE_MODE),
+    help="record: reuse identical LLM calls; replay: fail on anything not recorded",
+)
+engine = load_engine(llm_choice, llm_cache_mode)
+brief_process = st.sidebar.selectbox(
+    "Task execution", BRIEF_PROCESSES, index=BRIEF_PROCESSES.index(BRIEF_PROCESS),
+    help="hierarchical: manager LLM delegates tasks one by one; dag: independent tasks run in parallel",
+)
+isolate_runs = st.sidebar.checkbox(
+    "Isolated worker process", value=True,
+    help="Run each briefing in a process from a shared pool with its own log, so concurrent users don't mix output",
+)
+regenerate = st.sidebar.checkbox(
+    "Regenerate task outputs",
+    help="Run every task again instead of reusing outputs whose inputs did not change since an earlier run",
+)
+run_in_background = st.sidebar.checkbox(
+    "Run in background", help="Queue the briefing for a worker process; it keeps running if this page is closed",
+)
+
+
+@st.cache_resource
+def load_worker_pool():
+    return BriefWorkerPool(POOL_WORKERS)
+
+
+@st.cache_resource
+def load_job_queue():
+    return JobQueue()
+
+
+# stdout/stderr of the worker processes started by ensure_workers
+WORKER_LOG = os.path.join("Results", "workers.log")
+
+TASK_TITLES = {"outline": "Outline", "keyword_research": "Keyword research", "technical_seo": "Technical SEO"}
+
+
+def show_report_downloads(reports, key):
+    for fmt, path in reports.items():
+        with open(path, "rb") as f:
+            st.download_button(f"Download .{fmt}", f.read(), file_name=os.path.basename(path), key=f"{key}-{fmt}")
+
+
+def follow_job(job, log_stream):
+    """
+    Renders a running BriefJob: its log, its progress and one section per
+    task that streams the task's answer, then the finished brief. Returns
+    the job's result, or None when it failed.
+    """
+    status = st.status(f"Job {job.id} queued")
+    sections = TaskSections(st.container(), TASK_TITLES, key=job.id)
+    for kind, payload in job.events():
+        if kind == "log":
+            log_stream.write(payload)
+        elif kind == "progress":
+            status.update(label=f"Job {job.id}: {payload}")
+        elif kind == "semrush_error":
+            st.error("Error fetching SEMrush {} data: {}".format(*payload))
+        elif kind == "token":
+            sections.token(*payload)
+        elif kind == "task_done":
+            task, output = payload
+            sections.finish(task, task_markdown(task, output), f"{task}-{job.id}.md")
+        elif kind is None:
+            log_stream.flush()
+            sections.flush()
+    log_stream.close()
+    sections.close()
+
+    if job.status != "done":
+        status.update(label=f"Job {job.id}: failed", state="error")
+        st.error(f"An error occurred: {job.error}")
+        if log_stream.log_path:
+            with open(log_stream.log_path, encoding="utf-8") as f:
+                st.download_button("Download full log", f.read(), file_name=os.path.basename(log_stream.log_path))
+        return None
+
+    status.update(label=f"Job {job.id}: done", state="complete")
+    brief = job.result
+    if brief["reused_tasks"]:
+        st.caption(f"Reused unchanged task outputs: {', '.join(brief['reused_tasks'])}")
+    if brief["tokens_saved"]:
+        st.caption(f"Compact tool output saved {brief['tokens_saved']} tokens")
+    st.caption(f"LLM cost: ${brief['cost_usd']:.4f}")
+    with st.expander("Run trace (time, tokens and cost per agent, model, tool and task)"):
+        st.dataframe(brief["trace_summary"], use_container_width=True)
+        st.dataframe(brief["llm_usage"], use_container_width=True)
+        st.caption(f"Full trace: {brief['trace_path']}")
+    st.success(f"SEO Briefing has been generated successfully! [Download the document](/{brief['doc_file']})")
+    show_report_downloads(brief["reports"], job.id)
+    with open(brief["log_path"], encoding="utf-8") as f:
+        st.download_button("Download full log", f.read(), file_name=os.path.basename(brief["log_path"]))
+    return brief
+
+
+def ensure_workers(queue):
+    """
+    Launches detached worker processes when none are alive, at most once per
+    WORKER_LAUNCH_INTERVAL across all sessions. Returns whether a worker is alive.
+    """
+    if queue.live_workers():
+        return True
+    if queue.claim_worker_launch():
+        worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_queue.py")
+        os.makedirs(os.path.dirname(WORKER_LOG), exist_ok=True)
+        with open(WORKER_LOG, "ab") as log:
+            subprocess.Popen([sys.executable, worker_script], start_new_session=True,
+                             stdout=log, stderr=subprocess.STDOUT)
+    return False
+
+
+def show_jobs(job_queue):
+    """Lists this session's background jobs with their progress, downloads and logs."""
+    jobs = [job for job in map(job_queue.get, st.session_state["job_ids"]) if job is not None]
+    pending = any(job["status"] in ("queued", "running") for job in jobs)
+    workers_alive = ensure_workers(job_queue) if pending else True
+    for job in jobs:
+        job_id = job["id"]
+        label = f"**{job['params']['focus_keyword']}** ({job_id}): {job['status']}"
+        if job["status"] == "queued" and not workers_alive:
+            launched = job_queue.last_worker_launch()
+            since = f", last started {time.time() - launched:.0f}s ago" if launched else ""
+            st.error(f"{label}, but no worker process is running{since}. Worker output is in {WORKER_LOG}.")
+        elif job["status"] in ("queued", "running"):
+            st.write(f"{label}, {job['progress']}")
+        elif job["status"] == "done":
+            st.write(label)
+            show_report_downloads(job["result"]["reports"], job_id)
+        else:
+            st.error(f"{label}\n\n{job['error']}")
+        if job["log_path"] and os.path.exists(job["log_path"]):
+            with open(job["log_path"], encoding="utf-8") as f:
+                st.download_button("Download log", f.read(), file_name=os.path.basename(job["log_path"]), key=f"log-{job_id}")
+    if pending:
+        st.button("Refresh")
 
-        if "\n" in data:
-            self.expander.markdown(''.join(self.buffer), unsafe_allow_html=True)
-            self.buffer.clear()
-
-    def flush(self):
-        if self.buffer:
-            self.expander.markdown(''.join(self.buffer), unsafe_allow_html=True)
-            self.buffer.clear()
 
 st.markdown("""
     <style>
@@ -140,168 +204,88 @@ with st.form("research_form"):
     brand_name = st.text_input(brand_name_label, "Your Brand Name")
     submit_button = st.form_submit_button(submit_button_label)
 
-if submit_button:
+brief_params = {
+    "llm_choice": llm_choice,
+    "llm_cache_mode": llm_cache_mode,
+    "process": brief_process,
+    "reuse_outputs": not regenerate,
+    "focus_keyword": focus_keyword,
+    "target_audience": target_audience,
+    "tone": tone,
+    "key_points": key_points,
+    "brand_name": brand_name,
+    "lang": 'de' if is_german else 'us',
+}
+
+if submit_button and run_in_background:
+    job_queue = load_job_queue()
+    job_id = job_queue.submit(brief_params)
+    st.session_state.setdefault("job_ids", []).insert(0, job_id)
+    ensure_workers(job_queue)
+    st.info(f"Briefing queued as job {job_id}. Progress is shown under Background jobs.")
+
+elif submit_button and isolate_runs:
     process_output_expander = st.expander("Processing Output:")
-    sys.stdout = StreamToExpander(process_output_expander)
-    
-    try:
-        semrush_api_key = os.getenv('SEMRUSH_API_KEY')
-        lang = 'de' if is_german else 'us'
-        related_keywords = fetch_related_keywords(semrush_api_key, focus_keyword, lang)
-        qa_data = fetch_qa(semrush_api_key, focus_keyword, lang)
-        
-        
-        boss_agent = Agent(
-            role="Boss Agent",
-            goal="Lead the development of an effective SEO strategy to improve website visibility and search engine ranking. This includes overseeing the content creation process, setting deadlines, and ensuring quality standards are met. The goal is to produce high-quality content that meets client requirements and surpasses expectations, ultimately driving organic traffic and conversions.",
-            backstory="The SEO Strategy Manager is an experienced SEO professional with expertise in devising and executing successful SEO strategies. They possess a deep understanding of SEO best practices and stay updated on the latest trends and algorithm changes. Their leadership skills enable them to manage teams effectively and adapt strategies to achieve optimal results.",
-            tools=[
-                google_search,
-                website_scrapper,
-                google_trends_tool,
-            ],
-            llm=llm,
-            verbose=True,
-            allow_delegation=False,
-        )
+    job = load_worker_pool().submit(brief_params)
+    # The worker already writes Results/log-[job id].txt; this stream only renders
+    follow_job(job, StreamToExpander(process_output_expander))
 
-        researcher_agent = Agent(
-            role="Researcher Agent",
-            goal="Conduct in-depth research on relevant topics to inform the SEO strategy. This involves gathering data, identifying key trends, and analyzing competitor strategies. The goal is to provide valuable insights that contribute to the development of an effective SEO plan.",
-            backstory="The SEO Research Analyst is a skilled researcher with a knack for uncovering valuable insights from data. They possess strong analytical skills and a keen eye for detail, allowing them to identify emerging trends and opportunities. Their research expertise is instrumental in shaping the SEO strategy and driving website performance improvements.",
-            tools=[
-                google_search,
-                website_scrapper,
-                google_trends_tool,
-            ],
-            llm=llm,
-            verbose=True,
-            allow_delegation=False,
+elif submit_button:
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs("Results", exist_ok=True)
+    process_output_expander = st.expander("Processing Output:")
+    log_stream = StreamToExpander(process_output_expander, log_path=f"Results/log-[{run_id}].txt")
+    # The brief runs on a thread so this script thread stays free to render its answers as they stream
+    brief = follow_job(run_in_thread(run_id, brief_params, log_stream, engine=engine), log_stream)
+    if brief is not None:
+        if engine.llm_cache is not None:
+            st.caption("LLM cache: {hits} hits, {misses} misses".format(**engine.llm_cache.stats()))
+        st.caption(
+            "Search cache: {memo_hits} memo hits, {disk_hits} disk hits, {merged} merged, "
+            "{misses} misses ({hit_rate:.0%} hit rate)".format(**brief["search_cache"])
         )
 
-        technical_seo_agent = Agent(
-            role="Technical SEO Agent",
-            goal="Generate a comprehensive SEO brief report focused on optimizing website content for search engines. This includes analyzing meta tags, descriptions, related keywords, and search engine trends. The goal is to provide actionable recommendations to enhance website visibility and ranking in search engine results.",
-            backstory="The SEO Technical Analyst is an expert in technical SEO with a deep understanding of search engine algorithms and ranking factors. They possess advanced analytical skills and leverage data-driven insights to optimize website performance. Their expertise in identifying relevant keywords, optimizing meta tags, and leveraging search engine trends is crucial in improving website visibility and driving organic traffic.",
-            tools=[
-                google_search,
-                website_scrapper,
-                google_trends_tool,
-            ],
-            llm=llm,
-            verbose=True,
-            allow_delegation=False,
-        )
 
-        outliner_agent = Agent(
-            role="Outliner Agent",
-            goal=f"Create the initial outline for the SEO optimized landing page. This includes researching the topic, identifying key points, and structuring the content in a logical and engaging way. The landing page should be tailored to {target_audience} and have a {tone} tone.",
-            backstory="The Outliner Agent is a skilled writer with a talent for structuring content in a logical and engaging way. They have a deep understanding of the content creation process and are able to identify key points and themes. They are also knowledgeable about the latest trends and best practices in content creation and are able to adapt to changing circumstances.",
-            tools=[google_search, website_scrapper, google_trends_tool],
-            llm=llm,
-            verbose=True,
-            allow_delegation=False,
-        )
+if st.session_state.get("job_ids"):
+    job_queue = load_job_queue()
+    with st.expander("Background jobs", expanded=True):
+        auto_refresh = st.checkbox("Auto-refresh every 5 seconds", value=True)
+        # A fragment reruns on its own, so the rest of the page stays usable while jobs run
+        st.fragment(show_jobs, run_every=5 if auto_refresh else None)(job_queue)
 
-        outline_task = Task(
-            description=f"Create the initial outline for the blog post. This includes researching the topic, identifying key points, and structuring the content in a logical and engaging way. The blog post should be tailored to {target_audience} and have a {tone} tone. Focus on the key points: {key_points}.",
-            expected_output="A detailed outline for the blog post, including the main points and subpoints, as well as any relevant research or data.",
-            agent=outliner_agent,
-            output_file=f"Results/outline-[{timestamp}].md"
-        )
 
-        keyword_research_task = Task(
-            description=f"Conduct thorough keyword research to identify relevant keywords for the landing page focused on {focus_keyword}. This includes analyzing search volume, competition, and relevance to the topic. The landing page should be tailored to {target_audience} and have a {tone} tone. Focus on the key points: {key_points}.",
-            expected_output="A list of relevant keywords, along with their search volume and competition metrics.",
-            agent=technical_seo_agent,
-            output_file=f"Results/keyword_research-[{timestamp}].md"
-        )
+with st.expander("Batch mode: generate one briefing per CSV row"):
+    st.caption("CSV columns: keyword, audience, tone, key_points, brand (optional: language = us/de)")
+    batch_file = st.file_uploader("Upload keywords CSV", type="csv")
+    batch_workers = st.number_input("Parallel workers", min_value=1, max_value=8, value=2)
+    run_batch_button = st.button("Run batch")
 
-        technical_seo_task = Task(
-            description=f"Ensure that the blog post is optimized for search engines. This includes identifying relevant keywords, optimizing the meta tags and descriptions, and ensuring that the content is structured in a way that is easy for search engines to crawl and index. The blog post should be tailored to {target_audience} and have a {tone} tone. Focus on the key points: {key_points}. Semrush Fethched Keywords: {related_keywords} and Semrush QA_data: {qa_data}",
-            expected_output="""
-                    - Meta Title
-                    - Meta Description
-                    - Results of Competitor Search
-                    - Related Keywords (Proof Keywords)   // via semrush api features: related keywords
-                    - Headline hierarchies // via LLM suggestions
-                    - QA // via semrush api features:QA """,
-            agent=technical_seo_agent, 
-            output_file=f"Results/technical_seo-[{timestamp}].md"
-        )
+if run_batch_button and batch_file is not None:
+    batch_rows = load_batch_csv(batch_file.getvalue())
+    batch_name = re.sub(r"[^A-Za-z0-9]+", "-", os.path.splitext(batch_file.name)[0]).strip("-").lower()
+    progress = st.progress(0.0, text=f"0/{len(batch_rows)} briefs")
+    finished = []
 
-        # Define the Crew
-        research_crew = Crew(
-            agents=[
-                boss_agent,
-                outliner_agent,
-                researcher_agent,
-                technical_seo_agent,
-            ],
-            tasks=[
-                outline_task,
-                keyword_research_task,
-            ],
-            process=Process.hierarchical,
-            manager_llm=llm,
-        )
-
-        result = research_crew.kickoff()
-        st.write(result)
-        # Create a document with the required sections
-        doc = docx.Document()
-        doc.add_heading('SEO Briefing', 0)
-        doc.add_heading('Meta Title', level=1)
-        doc.add_paragraph(f'1er BMW Versicherung und Kosten | {brand_name}')
-        doc.add_heading('Meta Description', level=1)
-        doc.add_paragraph(f'Optimize your landing page for {focus_keyword} and attract {target_audience}.')
-        doc.add_heading('Results of Competitor Search', level=1)
-        # Include the result directly in the document
-        doc.add_paragraph(result)
-
-        doc.add_heading('Related Keywords (Proof Keywords)', level=1)
-        doc.add_paragraph(f'Related keywords for {focus_keyword}:')
-        table = doc.add_table(rows=1, cols=5)
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Keyword'
-        hdr_cells[1].text = 'Search Volume'
-        hdr_cells[2].text = 'Number of Results'
-        hdr_cells[3].text = 'Trend'
-        hdr_cells[4].text = 'Relevance'
-        for item in related_keywords:
-            row_cells = table.add_row().cells
-            row_cells[0].text = item['Ph']
-            row_cells[1].text = str(item['Nq'])
-            row_cells[2].text = str(item['Nr'])
-            row_cells[3].text = str(item['Td'])
-            row_cells[4].text = str(item['Rr'])
-
-        doc.add_heading('Headline Hierarchies', level=1)
-        # Include the headline hierarchies generated by LLM here
-        doc.add_paragraph('Headline hierarchies generated by the LLM will be placed here.')
-
-        doc.add_heading('QA', level=1)
-        doc.add_paragraph(f'Questions and Answers related to {focus_keyword}:')
-        table = doc.add_table(rows=1, cols=4)
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Question'
-        hdr_cells[1].text = 'Search Volume'
-        hdr_cells[2].text = 'Number of Results'
-        hdr_cells[3].text = 'Trend'
-        for item in qa_data:
-            row_cells = table.add_row().cells
-            row_cells[0].text = item['Ph']
-            row_cells[1].text = str(item['Nq'])
-            row_cells[2].text = str(item['Nr'])
-            row_cells[3].text = str(item['Td'])
-
-        # Save the document
-        doc_file = f"Results/SEO_Briefing_{timestamp}.docx"
-        doc.save(doc_file)
-
-        
-        st.success(f"SEO Briefing has been generated successfully! [Download the document](/{doc_file})")
+    def show_batch_result(entry):
+        finished.append(entry)
+        progress.progress(len(finished) / max(len(batch_rows), 1), text=f"{len(finished)}/{len(batch_rows)} briefs")
+        if entry["status"] == "done":
+            st.write(f"✅ {entry['keyword']}: [{entry['doc_file']}](/{entry['doc_file']})")
+        else:
+            st.error(f"{entry['keyword']}: {entry['error']}")
 
+    try:
+        manifest = run_batch(
+            batch_rows,
+            llm_choice,
+            workers=int(batch_workers),
+            manifest_path=os.path.join("Results", f"batch_{batch_name}.manifest.jsonl"),
+            on_result=show_batch_result,
+            llm_cache_mode=llm_cache_mode,
+            process=brief_process,
+            reuse_outputs=not regenerate,
+        )
+        done = sum(1 for e in manifest.entries.values() if e["status"] == "done")
+        st.success(f"Batch finished: {done}/{len(batch_rows)} briefings generated. Manifest: {manifest.path}")
     except Exception as e:
         st.error(f"An error occurred: {e}")
-
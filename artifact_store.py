@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import time
+
+from tools.disk_cache import get_cache
+
+ARTIFACT_TTL = int(os.getenv("ARTIFACT_TTL", 30 * 24 * 3600))
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", 200 * 1024 * 1024))
+
+
+def fingerprint(value):
+    """sha256 of the canonical JSON form of `value`."""
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _llm_name(llm):
+    if hasattr(llm, "runnable"):
+        # A model wrapped with_fallbacks: the primary and every fallback
+        return [_llm_name(model) for model in (llm.runnable, *llm.fallbacks)]
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def agent_config(agent):
+    """The parts of an Agent that change what it writes."""
+    return {
+        "role": agent.role,
+        "goal": agent.goal,
+        "backstory": agent.backstory,
+        "llm": _llm_name(agent.llm),
+        "tools": sorted(tool.name for tool in agent.tools or ()),
+        "allow_delegation": agent.allow_delegation,
+    }
+
+
+def task_fingerprint(task, upstream=()):
+    """
+    Fingerprint of everything that determines a Task's output: its own
+    description (which carries the SEMrush and keyword data), the expected
+    output, the agent configuration and the outputs it builds on.
+    """
+    return fingerprint({
+        "description": task.description,
+        "expected_output": task.expected_output,
+        "agent": agent_config(task.agent) if task.agent is not None else None,
+        "upstream": [fingerprint(output) for output in upstream],
+    })
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of task outputs.
+
+    Outputs are stored under the fingerprint of the inputs that produced
+    them, so a rerun with identical inputs finds the earlier output and any
+    change to an input (or to an upstream output) is a miss.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or get_cache("artifacts", ttl=ARTIFACT_TTL, max_entries=50000, max_bytes=ARTIFACT_MAX_BYTES)
+
+    def get(self, key):
+        entry = self.cache.get(("artifact", key))
+        return entry["output"] if entry else None
+
+    def put(self, key, output, name=None):
+        self.cache.set(("artifact", key), {"output": output, "name": name, "created": time.time()})
+
+    @staticmethod
+    def write_output_file(task, output):
+        """Writes a reused output where the Task would have written it."""
+        if task.output_file:
+            directory = os.path.dirname(task.output_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(task.output_file, "w", encoding="utf-8") as f:
+                f.write(output)
+
+    def stats(self):
+        return self.cache.stats()
+
+
+_store = None
+
+
+def get_artifact_store():
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
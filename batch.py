@@ -0,0 +1,191 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from brief_pipeline import BRIEF_PROCESSES, RESULTS_DIR, BriefEngine
+from llm_cache import LLM_CACHE_MODES
+from tools.rate_limit import RateLimiter
+from tools.semrush_client import set_rate_limiter
+
+# Column defaults mirror the Streamlit form
+BATCH_DEFAULTS = {
+    "keyword": "",
+    "audience": "Small business owners",
+    "tone": "Professional",
+    "key_points": "",
+    "brand": "Your Brand Name",
+    "language": "us",
+}
+
+
+def load_batch_csv(source):
+    """Reads keyword/audience/tone/key_points/brand rows from a path or text."""
+    if isinstance(source, str) and os.path.exists(source):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            text = f.read()
+    elif isinstance(source, bytes):
+        text = source.decode("utf-8-sig")
+    else:
+        text = source
+    rows = []
+    for raw in csv.DictReader(io.StringIO(text)):
+        row = dict(BATCH_DEFAULTS)
+        row.update({k.strip().lower(): (v or "").strip() for k, v in raw.items() if k and v and v.strip()})
+        if row["keyword"]:
+            rows.append(row)
+    return rows
+
+
+def row_key(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:40] or "brief"
+
+
+class BatchManifest:
+    """
+    Append-only JSONL log of finished rows. Rows already recorded as "done"
+    are skipped on the next run, so a crashed batch resumes where it stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A crash can leave a truncated last line behind
+                        continue
+                    self.entries[entry["key"]] = entry
+
+    def is_done(self, key):
+        return self.entries.get(key, {}).get("status") == "done"
+
+    def record(self, entry):
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def write_summary(self, path):
+        fields = ["key", "keyword", "status", "doc_file", "seconds", "error"]
+        with self._lock, open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            for entry in self.entries.values():
+                writer.writerow(entry)
+
+
+def run_batch(rows, llm_choice, workers=2, manifest_path=None, llm_rate=1.0, semrush_rate=5.0, on_result=None,
+              llm_cache_mode=None, process=None, reuse_outputs=True):
+    """
+    Generates one brief per row on a pool of `workers` threads. The LLM and
+    SEMrush rate limiters are shared by all workers. `on_result` is called
+    from the calling thread after each row finishes. Without `reuse_outputs`
+    every task runs again even when its inputs are unchanged.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    batch_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    manifest_path = manifest_path or os.path.join(RESULTS_DIR, f"batch_{batch_id}.manifest.jsonl")
+    manifest = BatchManifest(manifest_path)
+
+    engine = BriefEngine(llm_choice, rate_limiter=RateLimiter(llm_rate), llm_cache_mode=llm_cache_mode)
+    previous_semrush_limiter = set_rate_limiter(RateLimiter(semrush_rate))
+
+    def run_row(index, row):
+        key = row_key(row)
+        started = time.monotonic()
+        entry = {"key": key, "index": index, "keyword": row["keyword"]}
+        try:
+            brief = engine.run(
+                row["keyword"],
+                row["audience"],
+                row["tone"],
+                row["key_points"],
+                row["brand"],
+                lang=row["language"],
+                run_id=f"{batch_id}_{index:04d}_{_slug(row['keyword'])}",
+                process=process,
+                reuse_outputs=reuse_outputs,
+            )
+            entry.update(status="done", doc_file=brief["doc_file"])
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+        entry["seconds"] = round(time.monotonic() - started, 2)
+        manifest.record(entry)
+        return entry
+
+    pending = [(i, row) for i, row in enumerate(rows) if not manifest.is_done(row_key(row))]
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_row, i, row) for i, row in pending]
+            for future in as_completed(futures):
+                if on_result is not None:
+                    on_result(future.result())
+    finally:
+        set_rate_limiter(previous_semrush_limiter)
+        manifest.write_summary(os.path.splitext(manifest_path)[0] + ".summary.csv")
+    return manifest
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Generate one SEO brief per CSV row.")
+    parser.add_argument("csv_file", help="CSV with keyword,audience,tone,key_points,brand columns")
+    parser.add_argument("--llm", default="OpenAI GPT-4o", help="LLM option, as in the Streamlit app")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--llm-rate", type=float, default=1.0, help="LLM requests per second across workers")
+    parser.add_argument("--semrush-rate", type=float, default=5.0, help="SEMrush requests per second across workers")
+    parser.add_argument("--llm-cache", choices=LLM_CACHE_MODES, help="LLM response cache mode (default: LLM_CACHE_MODE)")
+    parser.add_argument("--process", choices=BRIEF_PROCESSES, help="Task execution mode (default: BRIEF_PROCESS)")
+    parser.add_argument("--regenerate", action="store_true", help="Run every task again instead of reusing unchanged outputs")
+    parser.add_argument("--manifest", help="Manifest to resume; defaults to one derived from the CSV name")
+    args = parser.parse_args()
+
+    rows = load_batch_csv(args.csv_file)
+    manifest_path = args.manifest or os.path.join(
+        RESULTS_DIR, f"batch_{_slug(os.path.splitext(os.path.basename(args.csv_file))[0])}.manifest.jsonl"
+    )
+
+    def report(entry):
+        print(f"[{entry['status']}] {entry['keyword']} ({entry['seconds']}s) {entry.get('doc_file') or entry.get('error')}")
+
+    manifest = run_batch(
+        rows,
+        args.llm,
+        workers=args.workers,
+        manifest_path=manifest_path,
+        llm_rate=args.llm_rate,
+        semrush_rate=args.semrush_rate,
+        on_result=report,
+        llm_cache_mode=args.llm_cache,
+        process=args.process,
+        reuse_outputs=not args.regenerate,
+    )
+    done = sum(1 for e in manifest.entries.values() if e["status"] == "done")
+    print(f"{done}/{len(rows)} briefs done. Manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
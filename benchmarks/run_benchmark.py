@@ -0,0 +1,166 @@
+"""
+Offline end-to-end benchmark of the app_version2 brief pipeline.
+
+The pipeline runs with its real tools and clients; only the services
+behind them (SEMrush, Serper, SerpApi, the scraped websites) are local HTTP
+stand-ins with configurable latency, and the LLM is a scripted chat model
+that calls every tool once and answers with the JSON each task asks for.
+Numbers therefore reflect our own pipeline overhead, including caching,
+compaction and output parsing, plus the simulated service time. Run from
+the repository root:
+
+    python -m benchmarks.run_benchmark --briefs 8 --concurrency 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep benchmark runs away from the real caches and telemetry
+_workdir = tempfile.mkdtemp(prefix="seo-bench-")
+os.environ["SEO_CACHE_DIR"] = os.path.join(_workdir, "cache")
+os.environ["LLM_CACHE_MODE"] = "off"
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("SEMRUSH_API_KEY", "benchmark")
+os.environ.setdefault("SERPER_API_KEY", "benchmark")
+
+import brief_pipeline  # noqa: E402
+from benchmarks.semrush_server import SemrushStubServer  # noqa: E402
+from benchmarks.service_server import ServiceStubServer  # noqa: E402
+from benchmarks.stubs import benchmark_tools, fake_chat_model  # noqa: E402
+from tools.semrush_client import get_client  # noqa: E402
+
+STAGES = ["build_agents", "semrush_wait", "cluster_keywords", "build_crew", "crew_kickoff", "parse_outputs", "write_document", "total"]
+
+
+@contextlib.contextmanager
+def _in_workdir():
+    """
+    Runs with the benchmark's temp dir as working directory. crewai strips
+    the leading "/" of a task's output_file, so results must use a relative
+    path, and the directory is created up front because concurrent dag
+    tasks race to create it otherwise.
+    """
+    previous = os.getcwd()
+    os.chdir(_workdir)
+    brief_pipeline.RESULTS_DIR = "Results"
+    os.makedirs(brief_pipeline.RESULTS_DIR, exist_ok=True)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_benchmark(briefs, concurrency, llm_latency, tool_latency, semrush_latency, process="hierarchical"):
+    client = get_client()
+    semrush_url = client.base_url
+    with _in_workdir(), SemrushStubServer(latency=semrush_latency) as semrush, \
+            ServiceStubServer(latency=tool_latency) as services:
+        client.base_url = semrush.url
+        engine = brief_pipeline.BriefEngine("benchmark", llm=fake_chat_model(llm_latency), tools=benchmark_tools(services))
+
+        def one(i):
+            return engine.run(
+                f"renting trailers insurance {i}",
+                "Small business owners",
+                "Professional",
+                "Benefits of renting trailers, insurance options",
+                "Your Brand Name",
+                run_id=f"bench_{i:04d}",
+                process=process,
+            )
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            # The agents are verbose; keep their output out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    results = list(pool.map(one, range(briefs)))
+        finally:
+            client.base_url = semrush_url
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stages = {}
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in results]
+        stages[stage] = {
+            "mean": statistics.mean(values),
+            "p50": statistics.median(values),
+            "max": max(values),
+        }
+    return {
+        "briefs": briefs,
+        "concurrency": concurrency,
+        "process": process,
+        "wall_seconds": wall,
+        "briefs_per_minute": briefs / wall * 60,
+        "peak_memory_mb": peak / 1024 / 1024,
+        "stages": stages,
+    }
+
+
+def print_report(report):
+    print(f"{report['briefs']} briefs, concurrency {report['concurrency']}, {report['process']} process")
+    print(f"{'stage':<16}{'mean s':>10}{'p50 s':>10}{'max s':>10}")
+    for stage, values in report["stages"].items():
+        print(f"{stage:<16}{values['mean']:>10.3f}{values['p50']:>10.3f}{values['max']:>10.3f}")
+    print(f"wall time:       {report['wall_seconds']:.2f}s")
+    print(f"throughput:      {report['briefs_per_minute']:.1f} briefs/min")
+    print(f"peak memory:     {report['peak_memory_mb']:.1f} MB")
+
+
+def check_regression(report, baseline, tolerance):
+    """Returns a list of messages for metrics that got worse than `tolerance` allows."""
+    failures = []
+    for stage, values in report["stages"].items():
+        before = baseline["stages"].get(stage, {}).get("mean")
+        if before and values["mean"] > before * (1 + tolerance):
+            failures.append(f"{stage}: mean {values['mean']:.3f}s vs baseline {before:.3f}s")
+    if report["briefs_per_minute"] < baseline["briefs_per_minute"] * (1 - tolerance):
+        failures.append(
+            f"throughput: {report['briefs_per_minute']:.1f} vs baseline {baseline['briefs_per_minute']:.1f} briefs/min"
+        )
+    if report["peak_memory_mb"] > baseline["peak_memory_mb"] * (1 + tolerance):
+        failures.append(f"peak memory: {report['peak_memory_mb']:.1f} vs baseline {baseline['peak_memory_mb']:.1f} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--briefs", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per scripted LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="seconds per stub Serper/page/SerpApi request")
+    parser.add_argument("--semrush-latency", type=float, default=0.4, help="seconds per stub SEMrush request")
+    parser.add_argument("--process", choices=brief_pipeline.BRIEF_PROCESSES, default="hierarchical")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="fail if slower than this earlier --json report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression vs baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.briefs, args.concurrency, args.llm_latency, args.tool_latency, args.semrush_latency, args.process)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regression(report, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TREND = "0.54,0.67,0.81,1.00,0.81,0.67,0.54,0.44,0.44,0.54,0.67,0.81"
+
+
+def phrase_rows(phrase, report_type, limit):
+    rows = []
+    for i in range(limit):
+        if report_type == "phrase_questions":
+            ph = f"how much does {phrase} cost {i}"
+        else:
+            ph = f"{phrase} variant {i}"
+        rows.append([ph, str(max(10, 1000 - i * 7)), str(100000 + i * 1234), TREND, f"{1 - i / (limit + 1):.2f}"])
+    return rows
+
+
+class SemrushStubHandler(BaseHTTPRequestHandler):
+    """Answers like api.semrush.com: ';'-separated CSV for GET reports and JSON for the ta/api/v3 endpoints."""
+
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type):
+        time.sleep(self.latency)
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        columns = params.get("export_columns", "Ph,Nq,Nr,Td,Rr").split(",")
+        limit = int(params.get("display_limit", 10))
+        offset = int(params.get("display_offset", 0))
+        header = {"Ph": "Keyword", "Nq": "Search Volume", "Nr": "Number of Results", "Td": "Trends", "Rr": "Related Relevance"}
+        rows = phrase_rows(params.get("phrase", ""), params.get("type"), offset + limit)[offset:]
+        lines = [";".join(header.get(c, c) for c in columns)]
+        for row in rows:
+            lines.append(";".join(row[: len(columns)]))
+        self._send("\r\n".join(lines), "text/plain; charset=utf-8")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        target = payload.get("target", "example.com")
+        rows = [
+            [target, f"competitor{i}.com", payload.get("display_date", "2023-06-01"), payload.get("country", "us"), round(0.3 / (i + 1), 4), 10000 // (i + 1), "referral"]
+            for i in range(int(payload.get("display_limit", 10)))
+        ]
+        self._send(json.dumps({"data": {"rows": rows}}), "application/json")
+
+
+class SemrushStubServer:
+    """Local stand-in for api.semrush.com running on a background thread."""
+
+    handler_class = SemrushStubHandler
+
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0):
+        handler = type("Handler", (self.handler_class,), {"latency": latency})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
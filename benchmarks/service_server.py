@@ -0,0 +1,94 @@
+import json
+import math
+import time
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.semrush_server import SemrushStubHandler, SemrushStubServer
+
+WEEK = 7 * 24 * 3600
+# Five years of weekly points, like a Google Trends "today 5-y" timeframe
+TREND_POINTS = 260
+
+
+def search_results(query, base_url, count=10):
+    return {
+        "searchParameters": {"q": query},
+        "organic": [
+            {
+                "title": f"{query.title()} guide {i}",
+                "link": f"{base_url}pages/{i}",
+                "snippet": f"Everything about {query}, part {i}: costs, coverage and common exclusions.",
+                "position": i + 1,
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def page_html(number):
+    paragraphs = "".join(
+        f"<p>Paragraph {i} of page {number} on renting trailers insurance, the cover it gives and what it costs.</p>"
+        for i in range(60)
+    )
+    return (
+        f"<html><head><title>Trailer insurance guide {number}</title><script>var tracking = 1;</script></head>"
+        "<body><nav><a href='/'>Home</a><a href='/pricing'>Pricing</a></nav>"
+        f"<main><h1>Trailer insurance guide {number}</h1>{paragraphs}</main>"
+        "<footer>Cookie settings</footer></body></html>"
+    )
+
+
+def trends_timeline(keywords, end=None):
+    end = int(end or time.time()) // WEEK * WEEK
+    timeline = []
+    for week in range(TREND_POINTS):
+        timestamp = end - (TREND_POINTS - 1 - week) * WEEK
+        values = []
+        for n, keyword in enumerate(keywords):
+            season = math.sin(2 * math.pi * week / 52 + n)
+            value = round(max(0, min(100, 40 + 10 * n + week / 10 + 20 * season)))
+            values.append({"query": keyword, "value": str(value), "extracted_value": value})
+        timeline.append({"date": time.strftime("%b %d, %Y", time.gmtime(timestamp)), "timestamp": str(timestamp),
+                         "values": values})
+    return {"interest_over_time": {"timeline_data": timeline}}
+
+
+class ServiceStubHandler(SemrushStubHandler):
+    """
+    Answers like the other services the tools call: Serper's search API
+    (POST /serper), web pages to scrape (GET /pages/<n>) and SerpApi's
+    Google Trends engine (GET /search).
+    """
+
+    @property
+    def base_url(self):
+        return f"http://{self.headers.get('Host')}/"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/pages/"):
+            self._send(page_html(url.path.rsplit("/", 1)[-1]), "text/html; charset=utf-8")
+        elif url.path.startswith("/search"):
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            keywords = [k.strip() for k in params.get("q", "").split(",") if k.strip()]
+            self._send(json.dumps(trends_timeline(keywords)), "application/json")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if urlparse(self.path).path.startswith("/serper"):
+            self._send(json.dumps(search_results(payload.get("q", ""), self.base_url)), "application/json")
+        else:
+            self.send_error(404)
+
+
+class ServiceStubServer(SemrushStubServer):
+    """Local stand-in for Serper, SerpApi and the scraped websites running on a background thread."""
+
+    handler_class = ServiceStubHandler
+
+    @property
+    def serper_url(self):
+        return self.url + "serper"
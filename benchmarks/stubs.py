@@ -0,0 +1,145 @@
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+import requests
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tools.scrape_cache import CachedScrapeWebsiteTool
+from tools.search_cache import CachedSerperDevTool
+from tools.trends import GoogleTrendsTool, TrendsService
+
+SEARCH_TOOL = "Search the internet"
+SCRAPE_TOOL = "Read website content"
+TRENDS_TOOL = "google_trends"
+DELEGATE_TOOL = "Delegate work to co-worker"
+
+OUTLINE_ANSWER = {
+    "headlines": [{
+        "level": 1,
+        "text": "Renting trailers insurance",
+        "children": [
+            {"level": 2, "text": "Benefits of renting trailers", "children": []},
+            {"level": 2, "text": "Insurance options", "children": [
+                {"level": 3, "text": "Liability cover", "children": []},
+                {"level": 3, "text": "Damage waivers", "children": []},
+            ]},
+            {"level": 2, "text": "Cost considerations", "children": []},
+        ],
+    }],
+}
+
+TECHNICAL_SEO_ANSWER = {
+    "meta_title": "Renting trailers insurance explained | Your Brand Name",
+    "meta_description": "What small business owners need to know about insuring rented trailers.",
+    "competitors": [
+        {"name": f"Trailer insurance guide {i}", "url": f"https://example{i}.com/trailer-insurance",
+         "notes": "Ranks with a cost calculator"}
+        for i in range(3)
+    ],
+    "recommendations": "- Answer the cost questions from SEMrush in an FAQ block\n- Link to the rental terms page",
+}
+
+KEYWORD_RESEARCH_ANSWER = """| keyword | volume | competition |
+| --- | --- | --- |
+| renting trailers insurance | 1000 | 0.42 |
+| trailer rental insurance cost | 720 | 0.35 |
+| do i need insurance to rent a trailer | 480 | 0.21 |"""
+
+_tool_names = re.compile(r"only one name of \[(.*?)\]")
+_used_tool = re.compile(r"^Action: (.+?)\s*$", re.MULTILINE)
+_coworkers = re.compile(r"co-workers: \[(.*?)\]")
+_focus_keyword = re.compile(r"focused on (.+?)\. ")
+_page_url = re.compile(r"https?://[^\s|,)\"']+/pages/\d+")
+
+
+def final_answer(prompt):
+    """The answer a task's expected output asks for: JSON for the outline and technical SEO tasks."""
+    if '"meta_title"' in prompt:
+        answer = json.dumps(TECHNICAL_SEO_ANSWER)
+    elif '"headlines"' in prompt:
+        answer = json.dumps(OUTLINE_ANSWER)
+    else:
+        answer = KEYWORD_RESEARCH_ANSWER
+    return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+
+def scripted_reply(prompt):
+    """
+    One ReAct step for `prompt`: the manager delegates once, the other
+    agents search, scrape a page from the results and look up the trend,
+    each once, and everyone then gives the final answer.
+    """
+    match = _tool_names.search(prompt)
+    tools = [name.strip() for name in match.group(1).split(",")] if match else []
+    used = {name for name in _used_tool.findall(prompt) if name in tools}
+    keyword = (_focus_keyword.search(prompt) or [None, "renting trailers insurance"])[1]
+
+    if DELEGATE_TOOL in tools:
+        if DELEGATE_TOOL in used:
+            return final_answer(prompt)
+        coworkers = [c.strip() for c in (_coworkers.search(prompt) or [None, "Researcher Agent"])[1].split(",")]
+        coworker = "Researcher Agent" if "Researcher Agent" in coworkers else coworkers[0]
+        action_input = {"coworker": coworker, "task": f"Research {keyword} for the current task",
+                        "context": f"The brief is about {keyword}."}
+        return f"Thought: The researcher should look into this first\nAction: {DELEGATE_TOOL}\nAction Input: {json.dumps(action_input)}"
+
+    if SEARCH_TOOL in tools and SEARCH_TOOL not in used:
+        return f"Thought: I should search first\nAction: {SEARCH_TOOL}\nAction Input: {json.dumps({'search_query': keyword})}"
+    pages = _page_url.findall(prompt)
+    if SCRAPE_TOOL in tools and SCRAPE_TOOL not in used and pages:
+        return f"Thought: I should read the top result\nAction: {SCRAPE_TOOL}\nAction Input: {json.dumps({'website_url': pages[0]})}"
+    if TRENDS_TOOL in tools and TRENDS_TOOL not in used:
+        return f"Thought: I should check the trend\nAction: {TRENDS_TOOL}\nAction Input: {json.dumps({'query': keyword})}"
+    return final_answer(prompt)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers with scripted_reply() after `latency` seconds."""
+
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self):
+        return "benchmark-scripted"
+
+    def _generate(self, messages: List[Any], stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        reply = scripted_reply("\n".join(str(m.content) for m in messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+
+def fake_chat_model(latency=0.5):
+    return ScriptedChatModel(latency=latency)
+
+
+class SerpApiStubClient:
+    """What the serpapi package's SerpApiClient does for get_dict(): GET <backend>/search with the params as JSON."""
+
+    def __init__(self, backend, params):
+        self.backend = backend
+        self.params = dict(params, output="json", source="python")
+
+    def get_dict(self):
+        return requests.get(self.backend.rstrip("/") + "/search", self.params, timeout=60).json()
+
+
+def serpapi_client_factory(backend):
+    """A TrendsService client_factory sending SerpApi requests to `backend` instead of serpapi.com."""
+    try:
+        from serpapi import SerpApiClient
+    except ImportError:
+        return lambda params: SerpApiStubClient(backend, params)
+    return type("StubSerpApiClient", (SerpApiClient,), {"BACKEND": backend.rstrip("/")})
+
+
+def benchmark_tools(server):
+    """The app's own search, scrape and Trends tools with their HTTP backends pointed at `server`."""
+    return (
+        CachedSerperDevTool(search_url=server.serper_url),
+        CachedScrapeWebsiteTool(),
+        GoogleTrendsTool(service=TrendsService(api_key="benchmark", client_factory=serpapi_client_factory(server.url))),
+    )
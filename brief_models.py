@@ -0,0 +1,139 @@
+"""
+Typed results of the brief Tasks.
+
+The outline and technical SEO tasks are asked for JSON matching these
+models. Their raw output is parsed and validated locally, once per distinct
+output, and the parsed form is kept in the artifact store. Nothing is sent
+back to an LLM to be reformatted: output that does not validate is left as
+text and the report falls back to showing it as written.
+"""
+import json
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from artifact_store import fingerprint, get_artifact_store
+
+_fenced_json = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_decoder = json.JSONDecoder()
+# Part of the memoized parse keys; bump when parse_output() accepts more input
+PARSER_VERSION = 2
+
+
+class Headline(BaseModel):
+    level: int = Field(ge=1, le=6, description="1 for H1, 2 for H2, ...")
+    text: str
+    children: List["Headline"] = Field(default_factory=list)
+
+
+class HeadlineTree(BaseModel):
+    headlines: List[Headline]
+
+    def to_markdown(self):
+        lines = []
+
+        def walk(headlines):
+            for headline in headlines:
+                lines.append(f"{'#' * headline.level} {headline.text}")
+                walk(headline.children)
+
+        walk(self.headlines)
+        return "\n".join(lines)
+
+
+class Competitor(BaseModel):
+    name: str
+    url: Optional[str] = None
+    notes: str = ""
+
+
+class TechnicalSeoResult(BaseModel):
+    meta_title: str = Field(description="At most 60 characters")
+    meta_description: str = Field(description="At most 160 characters")
+    competitors: List[Competitor] = Field(default_factory=list)
+    recommendations: str = Field("", description="Further SEO recommendations as Markdown")
+
+    def to_markdown(self):
+        lines = [f"**Meta title:** {self.meta_title}", "", f"**Meta description:** {self.meta_description}"]
+        if self.competitors:
+            lines += ["", "**Competitors:**"]
+            lines += [f"- {c.name}" + (f" ({c.url})" if c.url else "") + (f": {c.notes}" if c.notes else "")
+                      for c in self.competitors]
+        if self.recommendations:
+            lines += ["", self.recommendations]
+        return "\n".join(lines)
+
+
+class BriefResult(BaseModel):
+    """Everything extracted from one run's task outputs; fields are None when a task's output did not validate."""
+
+    technical_seo: Optional[TechnicalSeoResult] = None
+    outline: Optional[HeadlineTree] = None
+
+
+# Which model each task's output is parsed into
+TASK_MODELS = {
+    "outline": HeadlineTree,
+    "technical_seo": TechnicalSeoResult,
+}
+
+
+def json_instructions(model):
+    """Expected-output text asking for JSON matching `model`."""
+    schema = json.dumps(model.model_json_schema(), separators=(",", ":"))
+    return f"Answer with a single JSON object, and nothing else, that validates against this JSON schema:\n{schema}"
+
+
+def _candidates(text):
+    yield text.strip()
+    for match in _fenced_json.finditer(text):
+        yield match.group(1)
+    # Every complete JSON object in the text, e.g. one followed by prose with braces of its own
+    start = text.find("{")
+    while start != -1:
+        try:
+            _, end = _decoder.raw_decode(text, start)
+        except ValueError:
+            pass
+        else:
+            yield text[start:end]
+        start = text.find("{", start + 1)
+
+
+def parse_output(text, model):
+    """Returns `text` validated as `model`, or None when no JSON object in it validates."""
+    for candidate in _candidates(text):
+        try:
+            return model.model_validate_json(candidate)
+        except (ValidationError, ValueError):
+            continue
+    return None
+
+
+def parse_cached(text, model, artifacts=None):
+    """parse_output() memoized in the artifact store by model and text."""
+    artifacts = artifacts or get_artifact_store()
+    key = fingerprint(("parsed", PARSER_VERSION, model.__name__, model.model_json_schema(), text))
+    stored = artifacts.get(key)
+    if stored is not None:
+        return model.model_validate(stored["value"]) if stored["value"] is not None else None
+    parsed = parse_output(text, model)
+    artifacts.put(key, {"value": parsed.model_dump() if parsed is not None else None}, name=model.__name__)
+    return parsed
+
+
+def task_markdown(name, text):
+    """One task's output as Markdown: its parsed model when it validates, else the text as written."""
+    model = TASK_MODELS.get(name)
+    parsed = parse_output(text, model) if model is not None else None
+    return parsed.to_markdown() if parsed is not None else text
+
+
+def parse_brief(outputs, artifacts=None):
+    """Builds a BriefResult from {task name: raw output}."""
+    fields = {}
+    for name, model in TASK_MODELS.items():
+        if outputs.get(name):
+            fields[name] = parse_cached(outputs[name], model, artifacts)
+    return BriefResult(**fields)
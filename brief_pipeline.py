@@ -0,0 +1,428 @@
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from crewai import Agent, Task, Crew, Process
+
+from artifact_store import fingerprint, get_artifact_store, task_fingerprint
+from brief_models import HeadlineTree, TechnicalSeoResult, json_instructions, parse_brief
+from keyword_clusters import cluster_keywords, summarize_clusters
+from llm_cache import get_llm_cache
+from model_routing import AGENT_ROLES, LLM_STREAMING, ROLES, TASK_ROLES, ModelRouter, llm_usage
+from prompt_budget import PromptBudget
+from report import REPORT_FORMATS, Brief, render
+from task_graph import TaskGraph, TaskNode
+from tools.compact import compact_table, measure
+from tools.rate_limit import RateLimitCallbackHandler
+from tools.scrape_cache import CachedScrapeWebsiteTool
+from tools.search_cache import CachedSerperDevTool, search_cache
+from tools.semrush_prefetch import SemrushPrefetch
+from tools.streaming import AnswerStream, streaming_callback
+from tools.tracing import Tracer, instrument_tool, tracing_callback
+from tools.trends import TRENDS_BATCH_LIMIT, GoogleTrendsTool, get_trends_service
+
+RESULTS_DIR = "Results"
+
+# "hierarchical" runs the Crew under a manager LLM; "dag" runs the tasks as
+# a TaskGraph, concurrently where TASK_DEPENDENCIES allows it.
+BRIEF_PROCESSES = ("hierarchical", "dag")
+BRIEF_PROCESS = os.getenv("BRIEF_PROCESS", "hierarchical")
+DAG_WORKERS = int(os.getenv("DAG_WORKERS", 3))
+# Formats written for every brief besides the .docx; any of REPORT_FORMATS, comma separated
+REPORT_OUTPUTS = tuple(f for f in os.getenv("REPORT_OUTPUTS", "docx").split(",") if f in REPORT_FORMATS)
+
+# Upstream tasks whose output each task receives in "dag" mode. The outline
+# and the meta tags build on the keyword research and then run side by side.
+TASK_DEPENDENCIES = {
+    "keyword_research": [],
+    "outline": ["keyword_research"],
+    "technical_seo": ["keyword_research"],
+}
+
+
+def setup_tools():
+    google_search = CachedSerperDevTool()
+    website_scrapper = CachedScrapeWebsiteTool()
+    google_trends_tool = GoogleTrendsTool(service=get_trends_service())
+    return google_search, website_scrapper, google_trends_tool
+
+
+class BriefEngine:
+    """
+    The SEO brief pipeline with its LLM and tool clients built once.
+
+    An engine is cheap to run many times: each run() only creates the
+    Agents, Tasks and Crew for that brief and reuses the clients, so it can
+    be cached by the Streamlit apps and shared by CLI or batch workers.
+    """
+
+    def __init__(self, llm_option, rate_limiter=None, llm_cache_mode=None, llm=None, tools=None,
+                 section_budgets=None, artifacts=None):
+        self.llm_option = llm_option
+        self.section_budgets = section_budgets
+        self.artifacts = artifacts if artifacts is not None else get_artifact_store()
+        self.llm_cache = get_llm_cache(llm_cache_mode)
+        # `llm` and `tools` let benchmarks and tests swap in local stand-ins; a
+        # given `llm` serves every role
+        if llm is not None:
+            if not llm.callbacks:
+                llm.callbacks = []
+            for callback in (tracing_callback, streaming_callback):
+                if callback not in llm.callbacks:
+                    llm.callbacks.append(callback)
+            if rate_limiter is not None:
+                llm.callbacks.append(RateLimitCallbackHandler(rate_limiter))
+            self.router = None
+            self.llms = dict.fromkeys(ROLES, llm)
+        else:
+            self.router = ModelRouter(
+                llm_option, rate_limiter=rate_limiter, cache=self.llm_cache,
+                callbacks=[tracing_callback, streaming_callback], streaming=LLM_STREAMING,
+            )
+            self.llms = {role: self.router.llm(role) for role in ROLES}
+        self.llm = self.llms["writer"]
+        self.google_search, self.website_scrapper, self.google_trends_tool = tools or setup_tools()
+        for tool in self.tools:
+            instrument_tool(tool)
+
+    @property
+    def tools(self):
+        return [self.google_search, self.website_scrapper, self.google_trends_tool]
+
+    def build_agents(self, target_audience, tone):
+        boss_agent = Agent(
+            role="Boss Agent",
+            goal="Lead the development of an effective SEO strategy to improve website visibility and search engine ranking. This includes overseeing the content creation process, setting deadlines, and ensuring quality standards are met. The goal is to produce high-quality content that meets client requirements and surpasses expectations, ultimately driving organic traffic and conversions.",
+            backstory="The SEO Strategy Manager is an experienced SEO professional with expertise in devising and executing successful SEO strategies. They possess a deep understanding of SEO best practices and stay updated on the latest trends and algorithm changes. Their leadership skills enable them to manage teams effectively and adapt strategies to achieve optimal results.",
+            tools=[
+                self.google_search,
+                self.website_scrapper,
+                self.google_trends_tool,
+            ],
+            llm=self.llms[AGENT_ROLES["boss"]],
+            verbose=True,
+            allow_delegation=False,
+        )
+
+        researcher_agent = Agent(
+            role="Researcher Agent",
+            goal="Conduct in-depth research on relevant topics to inform the SEO strategy. This involves gathering data, identifying key trends, and analyzing competitor strategies. The goal is to provide valuable insights that contribute to the development of an effective SEO plan.",
+            backstory="The SEO Research Analyst is a skilled researcher with a knack for uncovering valuable insights from data. They possess strong analytical skills and a keen eye for detail, allowing them to identify emerging trends and opportunities. Their research expertise is instrumental in shaping the SEO strategy and driving website performance improvements.",
+            tools=[
+                self.google_search,
+                self.website_scrapper,
+                self.google_trends_tool,
+            ],
+            llm=self.llms[AGENT_ROLES["researcher"]],
+            verbose=True,
+            allow_delegation=False,
+        )
+
+        technical_seo_agent = Agent(
+            role="Technical SEO Agent",
+            goal="Generate a comprehensive SEO brief report focused on optimizing website content for search engines. This includes analyzing meta tags, descriptions, related keywords, and search engine trends. The goal is to provide actionable recommendations to enhance website visibility and ranking in search engine results.",
+            backstory="The SEO Technical Analyst is an expert in technical SEO with a deep understanding of search engine algorithms and ranking factors. They possess advanced analytical skills and leverage data-driven insights to optimize website performance. Their expertise in identifying relevant keywords, optimizing meta tags, and leveraging search engine trends is crucial in improving website visibility and driving organic traffic.",
+            tools=[
+                self.google_search,
+                self.website_scrapper,
+                self.google_trends_tool,
+            ],
+            llm=self.llms[AGENT_ROLES["technical_seo"]],
+            verbose=True,
+            allow_delegation=False,
+        )
+
+        outliner_agent = Agent(
+            role="Outliner Agent",
+            goal=f"Create the initial outline for the SEO optimized landing page. This includes researching the topic, identifying key points, and structuring the content in a logical and engaging way. The landing page should be tailored to {target_audience} and have a {tone} tone.",
+            backstory="The Outliner Agent is a skilled writer with a talent for structuring content in a logical and engaging way. They have a deep understanding of the content creation process and are able to identify key points and themes. They are also knowledgeable about the latest trends and best practices in content creation and are able to adapt to changing circumstances.",
+            tools=[self.google_search, self.website_scrapper, self.google_trends_tool],
+            llm=self.llms[AGENT_ROLES["outliner"]],
+            verbose=True,
+            allow_delegation=False,
+        )
+
+        return {
+            "boss": boss_agent,
+            "researcher": researcher_agent,
+            "technical_seo": technical_seo_agent,
+            "outliner": outliner_agent,
+        }
+
+    @property
+    def model_name(self):
+        return self.role_model_name("writer")
+
+    def role_model_name(self, role):
+        if self.router is not None:
+            return self.router.model_name(role)
+        llm = self.llms[role]
+        return getattr(llm, "model_name", None) or getattr(llm, "model", None)
+
+    def agent_for(self, agents, agent_name, task_name):
+        """The agent to run `task_name`, switched to the task's routed model when it differs from the agent's."""
+        agent = agents[agent_name]
+        llm = self.llms[TASK_ROLES.get(task_name, AGENT_ROLES[agent_name])]
+        if agent.llm is llm:
+            return agent
+        return agent.model_copy(update={"llm": llm})
+
+    def build_tasks(self, agents, focus_keyword, target_audience, tone, key_points, keyword_clusters, qa_data, run_id,
+                    budget=None):
+        budget = budget or PromptBudget(self.model_name)
+        target_audience = budget.fit("target_audience", target_audience)
+        tone = budget.fit("tone", tone)
+        key_points = budget.fit("key_points", key_points)
+        keyword_summary = budget.fit("keywords", summarize_clusters(keyword_clusters))
+        qa_rows = [(q.phrase, q.volume) for q in qa_data]
+        qa_summary = budget.fit("qa", measure(
+            "prompt:qa",
+            compact_table(["question", "volume"], qa_rows, max_rows=len(qa_rows), max_tokens=budget.budgets["qa"],
+                          model=budget.model),
+            lambda: "\n".join(f"- {q.phrase} ({q.volume})" for q in qa_data),
+            budget.model,
+        ))
+
+        outline_task = Task(
+            description=f"Create the initial outline for the blog post. This includes researching the topic, identifying key points, and structuring the content in a logical and engaging way. The blog post should be tailored to {target_audience} and have a {tone} tone. Focus on the key points: {key_points}.",
+            expected_output="A detailed outline for the blog post as its headline hierarchy, with the main points and subpoints as nested headlines. " + json_instructions(HeadlineTree),
+            agent=self.agent_for(agents, "outliner", "outline"),
+            output_file=f"{RESULTS_DIR}/outline-[{run_id}].json"
+        )
+
+        keyword_research_task = Task(
+            description=f"Conduct thorough keyword research to identify relevant keywords for the landing page focused on {focus_keyword}. This includes analyzing search volume, competition, and relevance to the topic. The landing page should be tailored to {target_audience} and have a {tone} tone. Focus on the key points: {key_points}.",
+            expected_output="A list of relevant keywords, along with their search volume and competition metrics.",
+            agent=self.agent_for(agents, "technical_seo", "keyword_research"),
+            output_file=f"{RESULTS_DIR}/keyword_research-[{run_id}].md"
+        )
+
+        technical_seo_task = Task(
+            description=f"Ensure that the blog post is optimized for search engines. This includes identifying relevant keywords, optimizing the meta tags and descriptions, and ensuring that the content is structured in a way that is easy for search engines to crawl and index. The blog post should be tailored to {target_audience} and have a {tone} tone. Focus on the key points: {key_points}. Semrush keyword clusters, ranked by total search volume:\n{keyword_summary}\nSemrush questions:\n{qa_summary}",
+            expected_output="The meta title, meta description, the competitors found in the search results and further SEO recommendations. " + json_instructions(TechnicalSeoResult),
+            agent=self.agent_for(agents, "technical_seo", "technical_seo"),
+            output_file=f"{RESULTS_DIR}/technical_seo-[{run_id}].json"
+        )
+
+        return {
+            "outline": outline_task,
+            "keyword_research": keyword_research_task,
+            "technical_seo": technical_seo_task,
+        }
+
+    def build_crew(self, agents, tasks):
+        # Define the Crew
+        return Crew(
+            agents=[
+                agents["boss"],
+                agents["outliner"],
+                agents["researcher"],
+                agents["technical_seo"],
+            ],
+            tasks=[
+                tasks["outline"],
+                tasks["keyword_research"],
+                tasks["technical_seo"],
+            ],
+            process=Process.hierarchical,
+            manager_llm=self.llms["manager"],
+        )
+
+    def write_document(self, outputs, focus_keyword, target_audience, brand_name, related_keywords, qa_data, run_id,
+                       formats=None, structured=None):
+        """
+        Renders the brief to Results/SEO_Briefing_<run_id>.<format> for the
+        .docx and each of `formats` (default REPORT_OUTPUTS) and returns
+        {format: path}. `outputs` are the raw task outputs by task name; the
+        JSON tasks only reach the report through `structured`.
+        """
+        technical_seo = structured and structured.technical_seo
+        outline = structured and structured.outline
+        brief = Brief(
+            focus_keyword, target_audience, brand_name, outputs.get("keyword_research"), related_keywords, qa_data,
+            meta_title=technical_seo and technical_seo.meta_title,
+            meta_description=technical_seo and technical_seo.meta_description,
+            headlines=outline and outline.to_markdown(),
+            competitors=technical_seo and technical_seo.competitors,
+            recommendations=technical_seo and technical_seo.recommendations,
+        )
+        return {
+            fmt: render(brief, f"{RESULTS_DIR}/SEO_Briefing_{run_id}.{fmt}", fmt)
+            for fmt in dict.fromkeys(("docx", *(formats or REPORT_OUTPUTS)))
+        }
+
+    def build_graph(self, tasks, budget=None, artifacts=None):
+        nodes = [TaskNode(name, task, TASK_DEPENDENCIES.get(name, ())) for name, task in tasks.items()]
+        return TaskGraph(nodes, fit_context=budget and (lambda text: budget.fit("research", text)), artifacts=artifacts)
+
+    def crew_fingerprint(self, tasks):
+        """Fingerprint of a hierarchical run: every task's inputs plus the manager model."""
+        return fingerprint({
+            "process": "hierarchical",
+            "manager": self.role_model_name("manager"),
+            "stored": "result_and_task_outputs",
+            # Crews stored before technical_seo joined the crew lack its output
+            "crew_tasks": ["outline", "keyword_research", "technical_seo"],
+            "tasks": {name: task_fingerprint(task) for name, task in tasks.items()},
+        })
+
+    def run(self, focus_keyword, target_audience, tone, key_points, brand_name,
+            lang="us", run_id=None, on_semrush_error=None, process=None, on_progress=None,
+            reuse_outputs=True, on_token=None, on_task_done=None):
+        """
+        Runs the SEO brief Crew for one focus keyword and writes the report files.
+        `process` selects "hierarchical" or "dag" execution (default BRIEF_PROCESS).
+        `on_progress(stage)` is called as each pipeline stage starts. With
+        `reuse_outputs`, task outputs whose inputs did not change since an
+        earlier run are taken from the artifact store instead of the LLM.
+
+        `on_token(task, text)` receives each task's final answer as it is
+        streamed (see AnswerStream; text None means the answer restarts) and
+        `on_task_done(task, output)` each task's output as soon as it is
+        final, before the remaining tasks finish. Both may be called from
+        worker threads.
+
+        Returns a dict with the crew result, the document path, the SEMrush data
+        used, any SEMrush fetch errors, per-stage timings in seconds, the run's
+        search cache counts and the Tracer holding every LLM, tool and task
+        record of the run.
+        """
+        run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        process = process or BRIEF_PROCESS
+        if process not in BRIEF_PROCESSES:
+            raise ValueError(f"Unknown process {process!r}, expected one of {BRIEF_PROCESSES}")
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        tracer = Tracer(path=f"{RESULTS_DIR}/trace-[{run_id}].jsonl", run_id=run_id)
+
+        def stage(name):
+            if on_progress is not None:
+                on_progress(name)
+            return tracer.span("stage", name)
+
+        answers = AnswerStream(on_token) if on_token is not None else None
+
+        def task_done(name, following=None):
+            record = tracer.task_callback(name)
+
+            def callback(output):
+                record(output)
+                # Hierarchical runs execute the crew's tasks in order on this thread
+                if answers is not None:
+                    answers.task = following
+                if on_task_done is not None:
+                    on_task_done(name, output.raw_output)
+            return callback
+
+        with tracer.activate(), answers.activate() if answers else nullcontext(), tracer.span("stage", "total"):
+            with stage("build_agents"):
+                # Kick off the SEMrush requests now so they run while the agents are built
+                semrush_prefetch = SemrushPrefetch(os.getenv('SEMRUSH_API_KEY'), focus_keyword, lang).start()
+                agents = self.build_agents(target_audience, tone)
+
+            with stage("semrush_wait"):
+                semrush_data, semrush_errors = semrush_prefetch.results()
+            if on_semrush_error is not None:
+                for report, err in semrush_errors.items():
+                    on_semrush_error(report, err)
+            related_keywords = semrush_data["related_keywords"]
+            qa_data = semrush_data["qa"]
+
+            with stage("cluster_keywords"):
+                keyword_clusters = cluster_keywords(related_keywords)
+            trends = getattr(self.google_trends_tool, "service", None)
+            if trends is not None and trends.key:
+                # One comparison request covers what the agents are most likely to ask Trends about
+                trends.prefetch([focus_keyword] + [c.label for c in keyword_clusters[:TRENDS_BATCH_LIMIT - 1]])
+
+            with stage("build_crew"):
+                budget = PromptBudget(self.model_name, self.section_budgets)
+                tasks = self.build_tasks(
+                    agents, focus_keyword, target_audience, tone, key_points, keyword_clusters, qa_data, run_id, budget
+                )
+                for name, task in tasks.items():
+                    now = time.time()
+                    tracer.record(
+                        "prompt", name, now, now,
+                        prompt_tokens=budget.count(task.description + task.expected_output),
+                        sections=dict(budget.usage),
+                    )
+                artifacts = self.artifacts if reuse_outputs else None
+                reused_tasks = []
+                if process == "dag":
+                    graph = self.build_graph(tasks, budget, artifacts)
+                else:
+                    crew = self.build_crew(agents, tasks)
+                    names = {id(task): name for name, task in tasks.items()}
+                    order = [names[id(task)] for task in crew.tasks]
+                    for name, following in zip(order, order[1:] + [None]):
+                        tasks[name].callback = task_done(name, following)
+                    if answers is not None:
+                        answers.task = order[0]
+
+            with stage("crew_kickoff"):
+                if process == "dag":
+                    outputs = graph.run(max_workers=DAG_WORKERS, on_done=on_task_done)
+                    result = "\n\n".join(outputs[name] for name in tasks if name in outputs)
+                    reused_tasks = graph.reused
+                else:
+                    # The manager decides how tasks feed each other, so only an unchanged crew is reused
+                    crew_key = self.crew_fingerprint(tasks) if artifacts is not None else None
+                    stored = artifacts.get(crew_key) if crew_key else None
+                    if stored is not None:
+                        result, outputs = stored["result"], stored["outputs"]
+                        reused_tasks = list(tasks)
+                        for name, output in outputs.items():
+                            artifacts.write_output_file(tasks[name], output)
+                        if on_task_done is not None:
+                            for name, output in outputs.items():
+                                on_task_done(name, output)
+                    else:
+                        result = str(crew.kickoff())
+                        outputs = {name: task.output.raw_output for name, task in tasks.items() if task.output}
+                        if crew_key:
+                            artifacts.put(crew_key, {"result": result, "outputs": outputs}, name="crew")
+
+            with stage("parse_outputs"):
+                structured = parse_brief(outputs, self.artifacts)
+
+            with stage("write_document"):
+                reports = self.write_document(
+                    outputs, focus_keyword, target_audience, brand_name, related_keywords, qa_data, run_id,
+                    structured=structured,
+                )
+
+        timings = {r["name"]: r["latency"] for r in tracer.records if r["kind"] == "stage"}
+        tokens_saved = sum(r.get("tokens_saved") or 0 for r in tracer.records)
+        usage = llm_usage(tracer)
+        return {
+            "result": result,
+            "structured": structured,
+            "doc_file": reports["docx"],
+            "reports": reports,
+            "related_keywords": related_keywords,
+            "keyword_clusters": keyword_clusters,
+            "qa_data": qa_data,
+            "semrush_errors": semrush_errors,
+            "timings": timings,
+            "search_cache": search_cache.stats(tracer),
+            "reused_tasks": reused_tasks,
+            "tokens_saved": tokens_saved,
+            "llm_usage": usage,
+            "cost_usd": sum(row["cost_usd"] for row in usage),
+            "trace": tracer,
+        }
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(llm_option, llm_cache_mode=None):
+    """Returns the process-wide BriefEngine for `llm_option`, building it on first use."""
+    key = (llm_option, llm_cache_mode)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = BriefEngine(llm_option, llm_cache_mode=llm_cache_mode)
+        return _engines[key]
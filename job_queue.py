@@ -0,0 +1,305 @@
+"""
+SQLite-backed queue of brief generation jobs and the worker processes that
+run them. Start workers with:
+
+    python job_queue.py --workers 2
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+from dotenv import load_dotenv
+
+from tools.disk_cache import CACHE_DIR
+
+JOBS_DB = os.getenv("JOBS_DB", os.path.join(CACHE_DIR, "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+HEARTBEAT_SECONDS = 10
+# A running job whose worker has not sent a heartbeat for this long is requeued
+STALE_SECONDS = 6 * HEARTBEAT_SECONDS
+# A job whose worker died this many times is failed instead of requeued, so
+# one job that crashes its worker (e.g. out of memory) cannot take down all of them
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", 3))
+# Workers started on demand by the web app get this long to send their first
+# heartbeat before they are launched again
+WORKER_LAUNCH_INTERVAL = STALE_SECONDS
+
+
+class JobQueue:
+    """
+    Durable job table shared by the web process and the workers.
+
+    Jobs move queued -> running -> done/failed. A job survives restarts of
+    both the web process and the workers: running jobs whose worker stopped
+    sending heartbeats are put back in the queue, up to MAX_JOB_ATTEMPTS
+    claims per job.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " progress TEXT,"
+                " result TEXT,"
+                " error TEXT,"
+                " log_path TEXT,"
+                " worker_pid INTEGER,"
+                " created REAL NOT NULL,"
+                " started REAL,"
+                " finished REAL,"
+                " heartbeat REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0)"
+            )
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass  # column already present
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            conn.execute("CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, started REAL, heartbeat REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS worker_launches (id INTEGER PRIMARY KEY CHECK (id = 0), launched REAL)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return contextlib.closing(conn)
+
+    def submit(self, params):
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, progress, created) VALUES (?, 'queued', ?, 'queued', ?)",
+                (job_id, json.dumps(params), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker_pid):
+        """Atomically takes the oldest queued job for `worker_pid`, or returns None."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', progress = 'starting', worker_pid = ?, started = ?, heartbeat = ?,"
+                " attempts = attempts + 1 WHERE id = ?",
+                (worker_pid, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return self.get(row["id"])
+
+    def update(self, job_id, **fields):
+        fields["heartbeat"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def finish(self, job_id, result):
+        self.update(job_id, status="done", progress="done", result=json.dumps(result, default=str), finished=time.time())
+
+    def fail(self, job_id, error):
+        self.update(job_id, status="failed", progress="failed", error=error, finished=time.time())
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def list_jobs(self, limit=50):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [_job(row) for row in rows]
+
+    def requeue_stale(self, max_age=STALE_SECONDS, max_attempts=MAX_JOB_ATTEMPTS):
+        """
+        Puts running jobs whose worker went silent back in the queue, or fails
+        them once they were claimed `max_attempts` times. Returns the number
+        requeued.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', progress = 'failed', worker_pid = NULL, finished = ?,"
+                " error = 'worker stopped responding on each of ' || attempts || ' attempts'"
+                " WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (now, now - max_age, max_attempts),
+            )
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 'requeued', worker_pid = NULL"
+                " WHERE status = 'running' AND heartbeat < ?",
+                (now - max_age,),
+            )
+            conn.execute("COMMIT")
+            return cursor.rowcount
+
+    def worker_heartbeat(self, pid, started=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (pid, started, heartbeat) VALUES (?, ?, ?)"
+                " ON CONFLICT(pid) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (pid, started or time.time(), time.time()),
+            )
+
+    def live_workers(self, max_age=STALE_SECONDS):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE heartbeat < ?", (time.time() - max_age,))
+            return conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+
+    def claim_worker_launch(self, min_interval=WORKER_LAUNCH_INTERVAL):
+        """
+        Records a worker launch and returns True, unless one was recorded in
+        the last `min_interval` seconds by any process using this queue.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO worker_launches (id, launched) VALUES (0, 0)")
+            cursor = conn.execute(
+                "UPDATE worker_launches SET launched = ? WHERE id = 0 AND launched <= ?", (now, now - min_interval)
+            )
+            return cursor.rowcount == 1
+
+    def last_worker_launch(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT launched FROM worker_launches WHERE id = 0").fetchone()
+        return row["launched"] if row and row["launched"] else None
+
+
+def _job(row):
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def run_brief(job_id, params, log, on_progress=None, on_semrush_error=None, on_token=None, on_task_done=None,
+              engine=None):
+    """
+    Runs one brief described by `params` in this process with stdout sent to
+    `log`, and returns the picklable/JSON-able parts of the result. `engine`
+    defaults to the process-wide engine for the params' LLM options.
+    """
+    from brief_pipeline import get_engine
+
+    engine = engine or get_engine(params["llm_choice"], params.get("llm_cache_mode"))
+    with contextlib.redirect_stdout(log):
+        brief = engine.run(
+            params["focus_keyword"],
+            params["target_audience"],
+            params["tone"],
+            params["key_points"],
+            params["brand_name"],
+            lang=params.get("lang", "us"),
+            run_id=job_id,
+            process=params.get("process"),
+            reuse_outputs=params.get("reuse_outputs", True),
+            on_progress=on_progress,
+            on_semrush_error=on_semrush_error,
+            on_token=on_token,
+            on_task_done=on_task_done,
+        )
+    return {
+        "doc_file": brief["doc_file"],
+        "reports": brief["reports"],
+        "result": str(brief["result"]),
+        "structured": brief["structured"].model_dump(),
+        "timings": brief["timings"],
+        "reused_tasks": brief["reused_tasks"],
+        "tokens_saved": brief["tokens_saved"],
+        "llm_usage": brief["llm_usage"],
+        "cost_usd": brief["cost_usd"],
+        "trace_path": brief["trace"].path,
+        "trace_summary": brief["trace"].summary(),
+        "semrush_errors": {k: str(v) for k, v in brief["semrush_errors"].items()},
+    }
+
+
+def job_log_path(job_id):
+    from brief_pipeline import RESULTS_DIR
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    return os.path.join(RESULTS_DIR, f"log-[{job_id}].txt")
+
+
+def run_job(queue, job):
+    """Runs one claimed job in this process, logging its stdout to its own file."""
+    log_path = job_log_path(job["id"])
+    queue.update(job["id"], log_path=log_path)
+    with open(log_path, "a", encoding="utf-8") as log:
+        return run_brief(
+            job["id"], job["params"], log,
+            on_progress=lambda stage: queue.update(job["id"], progress=stage),
+        )
+
+
+def run_worker(path=JOBS_DB, poll_interval=1.0):
+    """Worker process loop: claim a job, run it, record the outcome, repeat."""
+    load_dotenv()
+    queue = JobQueue(path)
+    pid = os.getpid()
+    started = time.time()
+    current = {"job": None}
+
+    def heartbeat():
+        while True:
+            queue.worker_heartbeat(pid, started)
+            if current["job"] is not None:
+                queue.update(current["job"])
+            time.sleep(HEARTBEAT_SECONDS)
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    while True:
+        queue.requeue_stale()
+        job = queue.claim(pid)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        current["job"] = job["id"]
+        try:
+            queue.finish(job["id"], run_job(queue, job))
+        except Exception:
+            queue.fail(job["id"], traceback.format_exc())
+        finally:
+            current["job"] = None
+
+
+def start_workers(count=JOB_WORKERS, path=JOBS_DB):
+    """Starts `count` worker processes and returns them."""
+    workers = []
+    for _ in range(count):
+        worker = multiprocessing.Process(target=run_worker, args=(path,), name="brief-worker")
+        worker.start()
+        workers.append(worker)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="number of worker processes")
+    parser.add_argument("--db", default=JOBS_DB)
+    args = parser.parse_args()
+    workers = start_workers(args.workers, args.db)
+    print(f"{len(workers)} brief workers running on {args.db}", file=sys.stderr)
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
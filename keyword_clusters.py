@@ -0,0 +1,143 @@
+import re
+
+import numpy as np
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of", "on", "or",
+    "the", "to", "what", "when", "where", "which", "who", "why", "with", "der", "die", "das", "und", "für",
+    "mit", "von", "ein", "eine", "ist", "wie", "was",
+}
+_word = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(phrase):
+    tokens = []
+    for word in _word.findall(phrase.lower()):
+        if word in STOP_WORDS:
+            continue
+        # Light plural folding so "trailer" and "trailers" share a term
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class KeywordCluster:
+    __slots__ = ("label", "keywords", "volume", "terms")
+
+    def __init__(self, label, keywords, volume, terms):
+        self.label = label
+        self.keywords = keywords
+        self.volume = volume
+        self.terms = terms
+
+    def __repr__(self):
+        return f"KeywordCluster({self.label!r}, {len(self.keywords)} keywords, volume={self.volume})"
+
+
+def dedupe_keywords(records):
+    """Drops phrases whose token set repeats an earlier one (word order, plurals, stop words), keeping the highest volume."""
+    best = {}
+    for record in records:
+        key = frozenset(tokenize(record.phrase))
+        if not key:
+            continue
+        current = best.get(key)
+        if current is None or (record.volume or 0) > (current.volume or 0):
+            best[key] = record
+    return sorted(best.values(), key=lambda r: r.volume or 0, reverse=True)
+
+
+def tfidf_matrix(token_lists):
+    """Row-normalised TF-IDF matrix over the terms that occur in at least two phrases."""
+    document_frequency = {}
+    for tokens in token_lists:
+        for token in set(tokens):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+    # Terms seen once cannot link two phrases, so they are left out of the vocabulary
+    vocabulary = {t: i for i, t in enumerate(sorted(t for t, df in document_frequency.items() if df > 1))}
+    n = len(token_lists)
+    matrix = np.zeros((n, max(len(vocabulary), 1)), dtype=np.float32)
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            column = vocabulary.get(token)
+            if column is not None:
+                matrix[row, column] += 1.0
+    idf = np.zeros(matrix.shape[1], dtype=np.float32)
+    for token, column in vocabulary.items():
+        idf[column] = np.log((1 + n) / (1 + document_frequency[token])) + 1
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix, vocabulary
+
+
+def cluster_keywords(records, threshold=0.5, duplicate_threshold=0.95):
+    """
+    Groups SEMrush keyword records into topical clusters.
+
+    Phrases are deduplicated, embedded as TF-IDF vectors and greedily
+    clustered around the highest-volume unassigned phrase: every phrase
+    with cosine similarity >= `threshold` to that seed joins its cluster.
+    Within a cluster, phrases nearly identical to a higher-volume one
+    (>= `duplicate_threshold`) are dropped. Dropped duplicates are still
+    searches for the topic, so a cluster's volume counts them too. Clusters
+    are returned ranked by total search volume.
+    """
+    demand = {}
+    for record in records:
+        key = frozenset(tokenize(record.phrase))
+        demand[key] = demand.get(key, 0) + (record.volume or 0)
+    records = dedupe_keywords(records)
+    if not records:
+        return []
+    token_lists = [tokenize(r.phrase) for r in records]
+    matrix, vocabulary = tfidf_matrix(token_lists)
+    terms = np.array(sorted(vocabulary, key=vocabulary.get) or [""], dtype=object)
+    volumes = np.array([r.volume or 0 for r in records], dtype=np.int64)
+    # Volume of each kept phrase plus the exact duplicates dedupe_keywords folded into it
+    totals = np.array([demand[frozenset(tokens)] for tokens in token_lists], dtype=np.int64)
+
+    unassigned = np.ones(len(records), dtype=bool)
+    clusters = []
+    # records are sorted by volume, so the first unassigned row is the best seed
+    for seed in range(len(records)):
+        if not unassigned[seed]:
+            continue
+        candidates = np.flatnonzero(unassigned)
+        similarity = matrix[candidates] @ matrix[seed]
+        members = candidates[similarity >= threshold]
+        if seed not in members:
+            members = np.append(members, seed)
+        unassigned[members] = False
+        members = members[np.argsort(-volumes[members], kind="stable")]
+
+        kept = []
+        for index in members:
+            if kept and float(np.max(matrix[kept] @ matrix[index])) >= duplicate_threshold:
+                continue
+            kept.append(index)
+        weights = matrix[kept].sum(axis=0)
+        top_terms = [terms[i] for i in np.argsort(-weights)[:3] if weights[i] > 0]
+        clusters.append(KeywordCluster(
+            label=records[seed].phrase,
+            keywords=[records[i] for i in kept],
+            volume=int(totals[members].sum()),
+            terms=top_terms,
+        ))
+    clusters.sort(key=lambda c: c.volume, reverse=True)
+    return clusters
+
+
+def summarize_clusters(clusters, max_clusters=15, keywords_per_cluster=5):
+    """Compact text summary of the top clusters for use in a Task prompt."""
+    lines = []
+    for cluster in clusters[:max_clusters]:
+        top = ", ".join(f"{k.phrase} ({k.volume})" for k in cluster.keywords[:keywords_per_cluster])
+        more = len(cluster.keywords) - keywords_per_cluster
+        suffix = f" +{more} more" if more > 0 else ""
+        lines.append(f"- {cluster.label} | total volume {cluster.volume} | {len(cluster.keywords)} keywords: {top}{suffix}")
+    rest = clusters[max_clusters:]
+    if rest:
+        lines.append(f"- ({len(rest)} smaller clusters, total volume {sum(c.volume for c in rest)})")
+    return "\n".join(lines)
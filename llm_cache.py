@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import re
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from tools.disk_cache import get_cache
+from tools.tracing import mark_cache_hit
+
+# "off" disables caching, "record" serves hits and stores misses, "replay"
+# only serves hits and raises CacheMissError on anything not recorded.
+LLM_CACHE_MODES = ("off", "record", "replay")
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 20000))
+
+_whitespace = re.compile(r"\s+")
+# Model settings that change how a response is obtained or delivered, not what it says
+_DELIVERY_SETTINGS = ("cache", "rate_limiter", "callbacks", "streaming")
+
+
+class CacheMissError(RuntimeError):
+    pass
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return _whitespace.sub(" ", value).strip()
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        # Message ids are random per call and must not affect the key
+        return {k: _normalize(v) for k, v in value.items() if k != "id"}
+    return value
+
+
+def model_identity(llm_string):
+    """
+    The stable part of LangChain's llm_string: the serialized model with its
+    delivery settings removed, plus the call parameters. Objects LangChain
+    cannot serialize (such as the cache itself) are written with their
+    memory address, so they would otherwise make every process's key unique.
+    """
+    serialized, separator, params = llm_string.rpartition("---")
+    try:
+        model = json.loads(serialized)
+    except ValueError:
+        return llm_string
+    kwargs = model.get("kwargs") or {}
+    model["kwargs"] = {
+        k: v for k, v in kwargs.items()
+        if k not in _DELIVERY_SETTINGS and not (isinstance(v, dict) and v.get("type") == "not_implemented")
+    }
+    model.pop("graph", None)
+    return json.dumps(model, sort_keys=True, separators=(",", ":")) + separator + params
+
+
+def normalize_prompt(prompt):
+    try:
+        value = json.loads(prompt)
+    except ValueError:
+        return _normalize(prompt)
+    return json.dumps(_normalize(value), sort_keys=True, separators=(",", ":"))
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache for chat model responses backed by a DiskCache.
+
+    Entries are keyed on the model configuration string and a hash of the
+    normalized messages, so whitespace-only prompt differences still hit.
+    """
+
+    def __init__(self, mode="record", cache=None):
+        if mode not in LLM_CACHE_MODES or mode == "off":
+            raise ValueError(f"Unsupported LLM cache mode: {mode}")
+        self.mode = mode
+        self.cache = cache or get_cache("llm", ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+
+    def _key(self, prompt, llm_string):
+        digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return (normalize_prompt(model_identity(llm_string)), digest)
+
+    def lookup(self, prompt, llm_string):
+        stored = self.cache.get(self._key(prompt, llm_string))
+        if stored is None:
+            if self.mode == "replay":
+                raise CacheMissError("LLM cache miss in replay mode for prompt: " + prompt[:200])
+            return None
+        mark_cache_hit()
+        return [loads(generation) for generation in stored]
+
+    def update(self, prompt, llm_string, return_val):
+        if self.mode == "replay":
+            return
+        self.cache.set(self._key(prompt, llm_string), [dumps(generation) for generation in return_val])
+
+    def clear(self, **kwargs):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def get_llm_cache(mode=None):
+    """Returns an LLMResponseCache for `mode` (defaults to LLM_CACHE_MODE), or None when off."""
+    mode = mode or LLM_CACHE_MODE
+    if mode == "off":
+        return None
+    return LLMResponseCache(mode)
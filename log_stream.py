@@ -0,0 +1,136 @@
+import re
+import threading
+import time
+from collections import deque
+
+ANSI_ESCAPE = re.compile(r'\x1B\[[0-9;]*[A-Za-z]')
+
+
+class StreamToExpander:
+    """
+    File-like sink for the Crew's verbose stdout.
+
+    Lines go into a bounded ring buffer that is rendered into a single
+    placeholder at most once per `refresh_interval` seconds, instead of one
+    Streamlit element per line. When `log_path` is set, the complete log is
+    also written to disk so it can be offered for download afterwards.
+    """
+
+    def __init__(self, expander, buffer_limit=1000, refresh_interval=0.5, log_path=None):
+        self.placeholder = expander.empty()
+        self.lines = deque(maxlen=buffer_limit)
+        self.partial = ""
+        self.refresh_interval = refresh_interval
+        self.log_path = log_path
+        self._log_file = open(log_path, "a", encoding="utf-8") if log_path else None
+        self._last_render = 0.0
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Streamlit elements can only be updated from the script thread
+        self._owner = threading.get_ident()
+
+    def write(self, data):
+        cleaned_data = ANSI_ESCAPE.sub('', data)
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.write(cleaned_data)
+            *complete, self.partial = (self.partial + cleaned_data).split("\n")
+            if complete:
+                self.lines.extend(complete)
+                self._dirty = True
+        if self._dirty and time.monotonic() - self._last_render >= self.refresh_interval:
+            self._render()
+        return len(data)
+
+    def _render(self):
+        if threading.get_ident() != self._owner:
+            return
+        with self._lock:
+            text = "  \n".join(self.lines)
+            if self.partial:
+                text += "  \n" + self.partial
+            self._dirty = False
+        self.placeholder.markdown(text, unsafe_allow_html=True)
+        self._last_render = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.flush()
+        if self._dirty or self.partial:
+            self._render()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+
+class TaskSections:
+    """
+    One page section per task. A task's answer is shown as it streams in
+    and replaced by its final form, with a download button, as soon as the
+    task completes, while later tasks are still running. Like
+    StreamToExpander, streamed text is rendered at most once per
+    `refresh_interval` seconds and only from the script thread.
+    """
+
+    def __init__(self, container, titles, key, refresh_interval=0.2):
+        self.key = key
+        self.refresh_interval = refresh_interval
+        self.text = dict.fromkeys(titles, "")
+        self.finished = set()
+        self._dirty = set()
+        self._last_render = 0.0
+        self._slots = {}
+        self._bodies = {}
+        self._actions = {}
+        for task, title in titles.items():
+            self._slots[task] = container.empty()
+            section = self._slots[task].container(border=True)
+            section.markdown(f"**{title}**")
+            self._bodies[task] = section.empty()
+            self._actions[task] = section.empty()
+            self._bodies[task].caption("Waiting for the agents...")
+
+    def token(self, task, text):
+        """Appends streamed `text` to `task`'s answer; None starts the answer over."""
+        if task not in self.text or task in self.finished:
+            return
+        self.text[task] = "" if text is None else self.text[task] + text
+        self._dirty.add(task)
+        if time.monotonic() - self._last_render >= self.refresh_interval:
+            self.flush()
+
+    def flush(self, cursor=" ▌"):
+        for task in self._dirty:
+            text = self.text[task]
+            # The JSON answers are easier to follow as code until they can be parsed
+            if text.lstrip().startswith(("{", "```")):
+                self._bodies[task].code(text, language="json")
+            else:
+                self._bodies[task].markdown(text + cursor)
+        self._dirty.clear()
+        self._last_render = time.monotonic()
+
+    def finish(self, task, markdown, file_name):
+        """Shows `task`'s final Markdown and offers it for download."""
+        if task not in self.text:
+            return
+        self.finished.add(task)
+        self._dirty.discard(task)
+        self._bodies[task].markdown(markdown)
+        # "ignore": downloading must not rerun the script and stop the running brief
+        self._actions[task].download_button(
+            "Download", markdown, file_name=file_name, key=f"{self.key}-{task}", on_click="ignore"
+        )
+
+    def close(self):
+        """Renders unfinished answers as they stand and removes the sections of tasks that never ran."""
+        self._dirty = {task for task, text in self.text.items() if text and task not in self.finished}
+        self.flush(cursor="")
+        for task, slot in self._slots.items():
+            if task not in self.finished and not self.text[task]:
+                slot.empty()
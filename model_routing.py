@@ -0,0 +1,161 @@
+"""
+Per-role model selection for the brief pipeline.
+
+Every agent and task is mapped to a role (manager, writer, research) and
+every role to a "provider:model" spec with fallbacks. Cheap, fast models do
+the tool-heavy research; the larger ones manage the crew and write the
+brief. Costs and latencies are read back from the run's trace.
+"""
+import json
+import os
+
+from langchain_anthropic import ChatAnthropic
+from langchain_openai import ChatOpenAI
+
+from tools.rate_limit import RateLimitCallbackHandler
+
+ROLES = ("manager", "writer", "research")
+
+# Routes per LLM option in the apps: role -> [primary, fallback, ...]
+MODEL_ROUTES = {
+    "OpenAI GPT-4o": {
+        "manager": ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-20240620"],
+        "writer": ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-20240620"],
+        "research": ["openai:gpt-4o-mini", "anthropic:claude-3-haiku-20240307"],
+    },
+    "Claude-3": {
+        "manager": ["anthropic:claude-3-5-sonnet-20240620", "openai:gpt-4o"],
+        "writer": ["anthropic:claude-3-5-sonnet-20240620", "openai:gpt-4o"],
+        "research": ["anthropic:claude-3-haiku-20240307", "openai:gpt-4o-mini"],
+    },
+    "Groq": {
+        "manager": ["groq:llama3-70b-8192", "openai:gpt-4o"],
+        "writer": ["groq:llama3-70b-8192", "openai:gpt-4o"],
+        "research": ["groq:llama3-8b-8192", "groq:mixtral-8x7b-32768", "openai:gpt-4o-mini"],
+    },
+}
+# Optional JSON overriding single roles, e.g. {"research": ["groq:llama3-8b-8192"]}
+MODEL_ROUTES_OVERRIDE = os.getenv("MODEL_ROUTES")
+
+# Which role runs each agent, and each task when it differs from its agent's
+AGENT_ROLES = {"boss": "manager", "researcher": "research", "technical_seo": "writer", "outliner": "writer"}
+TASK_ROLES = {"outline": "writer", "keyword_research": "research", "technical_seo": "writer"}
+
+# USD per million (input, output) tokens
+MODEL_PRICES = {
+    "gpt-4o": (5.0, 15.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "claude-3-5-sonnet-20240620": (3.0, 15.0),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+    "llama3-70b-8192": (0.59, 0.79),
+    "llama3-8b-8192": (0.05, 0.08),
+    "mixtral-8x7b-32768": (0.24, 0.24),
+}
+
+# Stream responses token by token so the apps can show answers as they are written
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+
+API_KEYS = {"openai": "OPENAI_API_KEY", "anthropic": "CLAUDE_API_KEY", "groq": "GROQ_API_KEY"}
+
+
+def _chat_groq(model, api_key, **kwargs):
+    # Optional backend: only needed when a route uses Groq
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(model=model, api_key=api_key, **kwargs)
+
+
+PROVIDERS = {
+    "openai": lambda model, api_key, **kwargs: ChatOpenAI(model=model, api_key=api_key, **kwargs),
+    "anthropic": lambda model, api_key, **kwargs: ChatAnthropic(model=model, api_key=api_key, **kwargs),
+    "groq": _chat_groq,
+}
+
+
+def rate_limit_errors():
+    """The rate-limit exception types of the installed provider SDKs."""
+    errors = []
+    for module in ("openai", "anthropic", "groq"):
+        try:
+            errors.append(__import__(module).RateLimitError)
+        except (ImportError, AttributeError):
+            pass
+    return tuple(errors)
+
+
+def model_cost(model, prompt_tokens, completion_tokens):
+    """USD cost of one call, or None for models without a known price."""
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    return ((prompt_tokens or 0) * price[0] + (completion_tokens or 0) * price[1]) / 1_000_000
+
+
+def llm_usage(tracer):
+    """
+    Calls, latency, tokens and cost per (agent, model) from a run's "llm"
+    records, most expensive first. Fallback attempts that failed are counted
+    as errors with their latency.
+    """
+    rows = {}
+    for r in tracer.records:
+        if r["kind"] != "llm":
+            continue
+        row = rows.setdefault((r["agent"], r["name"]), {
+            "agent": r["agent"], "model": r["name"], "calls": 0, "errors": 0, "latency_s": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        })
+        row["calls"] += 1
+        row["errors"] += 1 if r.get("error") else 0
+        row["latency_s"] += r["latency"]
+        row["prompt_tokens"] += r.get("prompt_tokens") or 0
+        row["completion_tokens"] += r.get("completion_tokens") or 0
+        if not r.get("cache_hit"):
+            row["cost_usd"] += model_cost(r["name"], r.get("prompt_tokens"), r.get("completion_tokens")) or 0.0
+    return sorted(rows.values(), key=lambda row: row["cost_usd"], reverse=True)
+
+
+class ModelRouter:
+    """
+    Builds one chat model per role for an LLM option, each wrapped with its
+    fallbacks for rate-limit errors. Fallback models whose provider has no
+    API key configured are skipped. A shared `rate_limiter` throttles every
+    call of every role through RateLimitCallbackHandler.
+    """
+
+    def __init__(self, llm_option, rate_limiter=None, cache=None, routes=None, callbacks=(), streaming=False):
+        base = MODEL_ROUTES.get(llm_option, MODEL_ROUTES["Claude-3"])
+        overrides = routes if routes is not None else json.loads(MODEL_ROUTES_OVERRIDE or "{}")
+        self.routes = {role: list(overrides.get(role, base[role])) for role in ROLES}
+        self.kwargs = {}
+        if cache is not None:
+            self.kwargs["cache"] = cache
+        if streaming:
+            self.kwargs["streaming"] = True
+        self.callbacks = list(callbacks)
+        if rate_limiter is not None:
+            self.callbacks.append(RateLimitCallbackHandler(rate_limiter))
+        self._models = {}
+        self._llms = {role: self._build(role) for role in ROLES}
+
+    def _model(self, spec):
+        if spec not in self._models:
+            provider, model = spec.split(":", 1)
+            llm = PROVIDERS[provider](model, os.getenv(API_KEYS[provider]), **self.kwargs)
+            llm.callbacks = list(self.callbacks)
+            self._models[spec] = llm
+        return self._models[spec]
+
+    def _build(self, role):
+        primary, *fallbacks = self.routes[role]
+        llm = self._model(primary)
+        fallbacks = [self._model(spec) for spec in fallbacks if os.getenv(API_KEYS[spec.split(":", 1)[0]])]
+        if not fallbacks:
+            return llm
+        return llm.with_fallbacks(fallbacks, exceptions_to_handle=rate_limit_errors())
+
+    def llm(self, role):
+        return self._llms[role]
+
+    def model_name(self, role):
+        return self.routes[role][0].split(":", 1)[1]
@@ -0,0 +1,56 @@
+from tools.tokens import count_tokens, truncate_to_tokens
+
+# Token budget per prompt section; anything longer is cut to fit
+DEFAULT_SECTION_BUDGETS = {
+    "target_audience": 100,
+    "tone": 20,
+    "key_points": 400,
+    "keywords": 800,
+    "qa": 400,
+    "research": 1500,
+}
+
+
+class PromptBudget:
+    """
+    Fits the variable sections of Task descriptions into per-section token
+    budgets for a given model and keeps track of what each section used.
+
+    Line-oriented sections (ranked keyword clusters, QA lists, research
+    notes) keep their leading lines and end with a count of what was left
+    out; free text is cut at the token limit.
+    """
+
+    def __init__(self, model=None, budgets=None):
+        self.model = model
+        self.budgets = dict(DEFAULT_SECTION_BUDGETS, **(budgets or {}))
+        self.usage = {}
+
+    def fit(self, section, text):
+        text = str(text)
+        budget = self.budgets.get(section)
+        if budget is None or count_tokens(text, self.model) <= budget:
+            fitted = text
+        elif "\n" in text:
+            fitted = self._fit_lines(text.splitlines(), budget)
+        else:
+            fitted = truncate_to_tokens(text, budget, self.model)
+        self.usage[section] = count_tokens(fitted, self.model)
+        return fitted
+
+    def _fit_lines(self, lines, budget):
+        kept, used = [], 0
+        for line in lines:
+            # One extra token per line for the newline
+            cost = count_tokens(line, self.model) + 1
+            if used + cost > budget:
+                break
+            kept.append(line)
+            used += cost
+        omitted = len(lines) - len(kept)
+        if omitted:
+            kept.append(f"(+{omitted} more lines omitted)")
+        return "\n".join(kept)
+
+    def count(self, text):
+        return count_tokens(text, self.model)
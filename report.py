@@ -0,0 +1,325 @@
+"""
+Renders an SEO brief to .docx, Markdown, HTML or JSON from one Brief model.
+
+Every format is written straight to its output path while the brief's
+sections are walked, so keyword tables are streamed row by row and memory
+stays flat however many keywords a report has. The .docx renderer loads its
+template once and streams word/document.xml into a copy of the template
+package instead of assembling a python-docx Document in memory.
+"""
+import html
+import json
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+import docx
+
+REPORT_FORMATS = ("docx", "md", "html", "json")
+# Template whose styles, page setup, headers and footers are reused for every
+# brief. A paragraph containing only {{brief}} marks where the brief goes;
+# without it the brief is appended to the template's body.
+REPORT_TEMPLATE = os.getenv(
+    "REPORT_TEMPLATE", os.path.join(os.path.dirname(docx.__file__), "templates", "default.docx")
+)
+BRIEF_MARKER = "{{brief}}"
+
+KEYWORD_COLUMNS = (
+    ("Keyword", lambda r: r.phrase),
+    ("Search Volume", lambda r: r.volume),
+    ("Number of Results", lambda r: r.results),
+    ("Trend", lambda r: r.trend_text),
+    ("Relevance", lambda r: r.relevance),
+)
+COMPETITOR_COLUMNS = (
+    ("Competitor", lambda c: c.name),
+    ("URL", lambda c: c.url),
+    ("Notes", lambda c: c.notes),
+)
+QA_COLUMNS = (
+    ("Question", lambda r: r.phrase),
+    ("Search Volume", lambda r: r.volume),
+    ("Number of Results", lambda r: r.results),
+    ("Trend", lambda r: r.trend_text),
+)
+
+_markdown_heading = re.compile(r"^(#{1,6})\s+(.*)$")
+# Characters that are not allowed in XML 1.0 documents
+_invalid_xml = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class Brief:
+    """
+    Structured content of one SEO brief, independent of the output format.
+
+    `sections()` is the single layout shared by all renderers: a sequence of
+    ("heading", text, level), ("paragraph", text), ("markdown", text) and
+    ("table", columns, records) blocks.
+    """
+
+    __slots__ = (
+        "focus_keyword", "target_audience", "brand_name", "meta_title", "meta_description",
+        "keyword_research", "headlines", "competitors", "recommendations", "related_keywords", "qa",
+    )
+
+    def __init__(self, focus_keyword, target_audience, brand_name, keyword_research=None, related_keywords=(), qa=(),
+                 meta_title=None, meta_description=None, headlines=None, competitors=None, recommendations=None):
+        self.focus_keyword = focus_keyword
+        self.target_audience = target_audience
+        self.brand_name = brand_name
+        self.meta_title = meta_title or f"{focus_keyword[:1].upper()}{focus_keyword[1:]} | {brand_name}"
+        self.meta_description = meta_description or (
+            f"Optimize your landing page for {focus_keyword} and attract {target_audience}."
+        )
+        # The keyword research task answers in prose; anything else it returns is left out
+        self.keyword_research = None if _is_json(keyword_research) else keyword_research
+        self.headlines = headlines
+        self.competitors = competitors or ()
+        self.recommendations = recommendations
+        self.related_keywords = related_keywords
+        self.qa = qa
+
+    def sections(self):
+        yield "heading", "SEO Briefing", 0
+        yield "heading", "Meta Title", 1
+        yield "paragraph", self.meta_title
+        yield "heading", "Meta Description", 1
+        yield "paragraph", self.meta_description
+        yield "heading", "Results of Competitor Search", 1
+        if self.competitors:
+            yield "table", COMPETITOR_COLUMNS, self.competitors
+        else:
+            yield "paragraph", "No competitors were extracted for this brief."
+        if self.keyword_research:
+            yield "heading", "Keyword Research", 1
+            yield "markdown", self.keyword_research
+        yield "heading", "Related Keywords (Proof Keywords)", 1
+        yield "paragraph", f"Related keywords for {self.focus_keyword}:"
+        yield "table", KEYWORD_COLUMNS, self.related_keywords
+        yield "heading", "Headline Hierarchies", 1
+        if self.headlines:
+            yield "markdown", str(self.headlines)
+        else:
+            yield "paragraph", "No headline hierarchy was generated for this brief."
+        yield "heading", "QA", 1
+        yield "paragraph", f"Questions and Answers related to {self.focus_keyword}:"
+        yield "table", QA_COLUMNS, self.qa
+        if self.recommendations:
+            yield "heading", "SEO Recommendations", 1
+            yield "markdown", self.recommendations
+
+    def to_dict(self):
+        return {
+            "focus_keyword": self.focus_keyword,
+            "target_audience": self.target_audience,
+            "brand_name": self.brand_name,
+            "meta_title": self.meta_title,
+            "meta_description": self.meta_description,
+            "keyword_research": self.keyword_research,
+            "headlines": self.headlines,
+            "competitors": [{name.lower(): value(c) for name, value in COMPETITOR_COLUMNS} for c in self.competitors],
+            "recommendations": self.recommendations,
+        }
+
+
+def _is_json(text):
+    """Whether `text` is a JSON object or array, i.e. a raw task answer rather than prose."""
+    if not text or text.lstrip()[:1] not in ("{", "["):
+        return False
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _cell_text(value):
+    return "" if value is None else str(value)
+
+
+def _markdown_lines(text):
+    """Yields (heading level or None, text) per non-empty line of Markdown-ish LLM output."""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _markdown_heading.match(line)
+        if match:
+            yield len(match.group(1)), match.group(2)
+        else:
+            yield None, line
+
+
+class DocxTemplate:
+    """A .docx package read once and reused as the frame of every rendered brief."""
+
+    def __init__(self, path=REPORT_TEMPLATE):
+        self.path = path
+        with zipfile.ZipFile(path) as package:
+            self.parts = [(info, package.read(info.filename)) for info in package.infolist()]
+        document = dict((info.filename, data) for info, data in self.parts)["word/document.xml"].decode("utf-8")
+        marker = document.find(BRIEF_MARKER)
+        if marker != -1:
+            # Replace the whole paragraph that holds the marker
+            start = document.rfind("<w:p>", 0, marker)
+            start = max(start, document.rfind("<w:p ", 0, marker))
+            end = document.index("</w:p>", marker) + len("</w:p>")
+        else:
+            start = end = document.rfind("<w:sectPr")
+            if start == -1:
+                start = end = document.rindex("</w:body>")
+        self.head = document[:start].encode("utf-8")
+        self.tail = document[end:].encode("utf-8")
+
+    def render(self, chunks, path):
+        """Writes the template to `path` with the XML `chunks` streamed into the document body."""
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+            for info, data in self.parts:
+                if info.filename != "word/document.xml":
+                    package.writestr(info, data)
+                    continue
+                with package.open("word/document.xml", "w") as body:
+                    body.write(self.head)
+                    for chunk in chunks:
+                        body.write(chunk.encode("utf-8"))
+                    body.write(self.tail)
+        return path
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_template(path=REPORT_TEMPLATE):
+    with _templates_lock:
+        if path not in _templates:
+            _templates[path] = DocxTemplate(path)
+        return _templates[path]
+
+
+def _xml_text(text):
+    return escape(_invalid_xml.sub("", _cell_text(text)))
+
+
+def _docx_paragraph(text, style=None):
+    style = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f'<w:p>{style}<w:r><w:t xml:space="preserve">{_xml_text(text)}</w:t></w:r></w:p>'
+
+
+def _docx_heading(text, level):
+    return _docx_paragraph(text, "Title" if level == 0 else f"Heading{min(level, 9)}")
+
+
+def _docx_row(values, header=False):
+    cells = "".join(
+        f"<w:tc>{_docx_paragraph(v)}</w:tc>" if not header else
+        f'<w:tc><w:p><w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{_xml_text(v)}</w:t></w:r></w:p></w:tc>'
+        for v in values
+    )
+    header = '<w:trPr><w:tblHeader/></w:trPr>' if header else ""
+    return f"<w:tr>{header}{cells}</w:tr>"
+
+
+def docx_chunks(brief):
+    """WordprocessingML for the brief's sections, one block or table row at a time."""
+    for kind, *block in brief.sections():
+        if kind == "heading":
+            yield _docx_heading(*block)
+        elif kind == "paragraph":
+            yield _docx_paragraph(block[0])
+        elif kind == "markdown":
+            for level, line in _markdown_lines(block[0]):
+                yield _docx_heading(line, level + 1) if level else _docx_paragraph(line)
+        elif kind == "table":
+            columns, records = block
+            yield (
+                '<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="0" w:type="auto"/></w:tblPr>'
+                "<w:tblGrid>" + '<w:gridCol w:w="1700"/>' * len(columns) + "</w:tblGrid>"
+            )
+            yield _docx_row([name for name, _ in columns], header=True)
+            for record in records:
+                yield _docx_row([value(record) for _, value in columns])
+            yield "</w:tbl>"
+
+
+def render_docx(brief, path, template=None):
+    return (template or get_template()).render(docx_chunks(brief), path)
+
+
+def _md_cell(value):
+    return _cell_text(value).replace("|", "\\|").replace("\n", " ")
+
+
+def render_markdown(brief, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for kind, *block in brief.sections():
+            if kind == "heading":
+                text, level = block
+                f.write(f"{'#' * (level + 1)} {text}\n\n")
+            elif kind == "paragraph":
+                f.write(f"{block[0]}\n\n")
+            elif kind == "markdown":
+                # Nest the LLM's own headings below the section heading
+                for level, line in _markdown_lines(block[0]):
+                    f.write(f"{'#' * min(level + 2, 6)} {line}\n\n" if level else f"{line}\n\n")
+            elif kind == "table":
+                columns, records = block
+                f.write("| " + " | ".join(name for name, _ in columns) + " |\n")
+                f.write("|" + "---|" * len(columns) + "\n")
+                for record in records:
+                    f.write("| " + " | ".join(_md_cell(value(record)) for _, value in columns) + " |\n")
+                f.write("\n")
+    return path
+
+
+def render_html(brief, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(brief.meta_title)}</title>"
+                "</head><body>\n")
+        for kind, *block in brief.sections():
+            if kind == "heading":
+                text, level = block
+                f.write(f"<h{level + 1}>{html.escape(text)}</h{level + 1}>\n")
+            elif kind == "paragraph":
+                f.write(f"<p>{html.escape(block[0])}</p>\n")
+            elif kind == "markdown":
+                for level, line in _markdown_lines(block[0]):
+                    tag = f"h{min(level + 2, 6)}" if level else "p"
+                    f.write(f"<{tag}>{html.escape(line)}</{tag}>\n")
+            elif kind == "table":
+                columns, records = block
+                f.write("<table>\n<thead><tr>" + "".join(f"<th>{html.escape(name)}</th>" for name, _ in columns)
+                        + "</tr></thead>\n<tbody>\n")
+                for record in records:
+                    f.write("<tr>" + "".join(f"<td>{html.escape(_cell_text(value(record)))}</td>"
+                                             for _, value in columns) + "</tr>\n")
+                f.write("</tbody>\n</table>\n")
+        f.write("</body></html>\n")
+    return path
+
+
+def render_json(brief, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(brief.to_dict(), ensure_ascii=False)[:-1])
+        for key, columns, records in (("related_keywords", KEYWORD_COLUMNS, brief.related_keywords),
+                                      ("qa", QA_COLUMNS, brief.qa)):
+            f.write(f', "{key}": [')
+            for i, record in enumerate(records):
+                row = {name.lower().replace(" ", "_"): value(record) for name, value in columns}
+                f.write(("," if i else "") + json.dumps(row, ensure_ascii=False))
+            f.write("]")
+        f.write("}\n")
+    return path
+
+
+RENDERERS = {"docx": render_docx, "md": render_markdown, "html": render_html, "json": render_json}
+
+
+def render(brief, path, fmt=None):
+    """Renders `brief` to `path`; the format defaults to the path's extension."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".")
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown report format {fmt!r}, expected one of {REPORT_FORMATS}")
+    return RENDERERS[fmt](brief, path)
@@ -0,0 +1,145 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from crewai import Crew, Process
+
+from artifact_store import task_fingerprint
+from tools.streaming import streaming_task
+from tools.tracing import current_tracer, trace_span
+
+
+class TaskNode:
+    def __init__(self, name, task, depends_on=()):
+        self.name = name
+        self.task = task
+        self.depends_on = list(depends_on)
+
+
+class TaskGraph:
+    """
+    Runs crewai Tasks as a dependency graph instead of one hierarchical Crew.
+
+    Every node runs as a single-task sequential Crew, so there is no manager
+    LLM in the loop. Nodes whose dependencies are finished run concurrently
+    on a thread pool, and each node only sees the outputs of the nodes it
+    depends on. With an ArtifactStore, nodes whose inputs are unchanged
+    since an earlier run reuse that run's output instead of executing.
+    """
+
+    def __init__(self, nodes=(), fit_context=None, artifacts=None):
+        # Optional callable that shrinks upstream outputs to the prompt budget
+        self.fit_context = fit_context
+        self.artifacts = artifacts
+        self.reused = []
+        self.nodes = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate task node: {node.name}")
+        self.nodes[node.name] = node
+        return node
+
+    def order(self):
+        """Returns node names in a valid execution order, raising on unknown or cyclic dependencies."""
+        for node in self.nodes.values():
+            missing = [d for d in node.depends_on if d not in self.nodes]
+            if missing:
+                raise ValueError(f"Task {node.name} depends on unknown tasks: {missing}")
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dependency in self.nodes[name].depends_on:
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+        return order
+
+    def _prepare(self, node, outputs):
+        task = node.task
+        if node.depends_on:
+            context = "\n\n".join(f"### {name}\n{outputs[name]}" for name in node.depends_on)
+            if self.fit_context is not None:
+                context = self.fit_context(context)
+            task.description = f"{task.description}\n\nUse these results from earlier steps:\n{context}"
+        return task
+
+    def run_node(self, node, outputs, key=None):
+        task = self._prepare(node, outputs)
+        with streaming_task(node.name), trace_span("task", node.name):
+            crew = Crew(agents=[task.agent], tasks=[task], process=Process.sequential)
+            output = str(crew.kickoff())
+        if key is not None:
+            self.artifacts.put(key, output, name=node.name)
+        return output
+
+    def _reuse(self, node, outputs):
+        """Returns (fingerprint, stored output or None) for a node whose dependencies are done."""
+        if self.artifacts is None:
+            return None, None
+        # Fingerprint before _prepare appends the upstream context to the description
+        key = task_fingerprint(node.task, [outputs[d] for d in node.depends_on])
+        output = self.artifacts.get(key)
+        if output is not None:
+            self.artifacts.write_output_file(node.task, output)
+            tracer = current_tracer()
+            if tracer is not None:
+                now = time.time()
+                tracer.record("task", node.name, now, now, cache_hit=True, output_chars=len(output))
+            self.reused.append(node.name)
+        return key, output
+
+    def run(self, max_workers=4, on_done=None):
+        """
+        Executes the graph and returns {name: output}. `on_done(name, output)`
+        is called from the calling thread as each node finishes.
+        """
+        self.order()
+        # Agents keep per-execution state, so concurrent nodes must not share one
+        seen_agents = set()
+        for node in self.nodes.values():
+            if id(node.task.agent) in seen_agents:
+                node.task.agent = node.task.agent.copy()
+            seen_agents.add(id(node.task.agent))
+
+        outputs, running = {}, {}
+        pending = dict(self.nodes)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-graph") as pool:
+            while pending or running:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name, node in list(pending.items()):
+                        if not all(d in outputs for d in node.depends_on):
+                            continue
+                        del pending[name]
+                        key, output = self._reuse(node, outputs)
+                        if output is not None:
+                            # Reused outputs can make further nodes ready straight away
+                            outputs[name] = output
+                            progressed = True
+                            if on_done is not None:
+                                on_done(name, output)
+                            continue
+                        # Copy the context so the active tracer and answer stream follow the node into its thread
+                        future = pool.submit(contextvars.copy_context().run, self.run_node, node, outputs, key)
+                        running[future] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name] = future.result()
+                    if on_done is not None:
+                        on_done(name, outputs[name])
+        return outputs
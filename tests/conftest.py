@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# crewai's telemetry would try to reach its collector from every Crew
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from tools import disk_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Points every DiskCache at a fresh directory so tests never see each other's entries."""
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(disk_cache, "_caches", {})
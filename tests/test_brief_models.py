@@ -0,0 +1,22 @@
+from brief_models import HeadlineTree, TechnicalSeoResult, parse_output
+
+
+def test_parses_object_followed_by_prose_with_braces():
+    text = (
+        'Here is the result:\n{"meta_title": "Trailer insurance", "meta_description": "What to know", '
+        '"competitors": [{"name": "Acme", "url": "acme.com"}]}\n'
+        "Use {brand} as a placeholder in the H1."
+    )
+    parsed = parse_output(text, TechnicalSeoResult)
+    assert parsed.meta_title == "Trailer insurance"
+    assert parsed.competitors[0].name == "Acme"
+
+
+def test_skips_objects_that_do_not_validate():
+    text = 'Schema {"type": "object"} and the answer {"headlines": [{"level": 1, "text": "Renting trailers"}]}'
+    parsed = parse_output(text, HeadlineTree)
+    assert parsed.to_markdown() == "# Renting trailers"
+
+
+def test_returns_none_without_a_valid_object():
+    assert parse_output("No JSON here {just braces}", TechnicalSeoResult) is None
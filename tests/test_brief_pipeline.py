@@ -0,0 +1,44 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+import brief_pipeline
+from artifact_store import ArtifactStore
+from benchmarks.semrush_server import SemrushStubServer
+from benchmarks.service_server import ServiceStubServer
+from benchmarks.stubs import benchmark_tools, fake_chat_model
+from tools.semrush_client import get_client
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SEMRUSH_API_KEY", "test")
+    monkeypatch.setenv("SERPER_API_KEY", "test")
+    with SemrushStubServer() as semrush, ServiceStubServer() as services:
+        monkeypatch.setattr(get_client(), "base_url", semrush.url)
+        yield brief_pipeline.BriefEngine(
+            "test", llm=fake_chat_model(0), tools=benchmark_tools(services), artifacts=ArtifactStore(),
+        )
+
+
+def run(engine, run_id, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return engine.run("renting trailers insurance", "Small business owners", "Professional", "Costs",
+                          "Acme", run_id=run_id, process="hierarchical", **kwargs)
+
+
+def test_reused_outputs_rewrite_the_task_files_unless_regenerating(engine):
+    first = run(engine, "first")
+    assert first["reused_tasks"] == []
+    assert first["structured"].technical_seo.meta_title.startswith("Renting trailers insurance")
+
+    second = run(engine, "second")
+    assert sorted(second["reused_tasks"]) == ["keyword_research", "outline", "technical_seo"]
+    for name, ext in (("outline", "json"), ("keyword_research", "md"), ("technical_seo", "json")):
+        assert os.path.exists(f"Results/{name}-[second].{ext}")
+    assert os.path.exists(second["doc_file"])
+
+    assert run(engine, "third", reuse_outputs=False)["reused_tasks"] == []
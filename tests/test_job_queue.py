@@ -0,0 +1,29 @@
+from job_queue import JobQueue
+
+
+def test_job_that_keeps_killing_workers_fails_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.submit({"focus_keyword": "trailer insurance"})
+
+    for attempt in range(3):
+        assert queue.claim(worker_pid=100 + attempt)["id"] == job_id
+        # The worker dies without another heartbeat
+        assert queue.requeue_stale(max_age=-1, max_attempts=3) == (1 if attempt < 2 else 0)
+
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert "3 attempts" in job["error"]
+    assert queue.claim(worker_pid=200) is None
+
+
+def test_worker_launches_are_throttled_across_callers(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    first, second = JobQueue(path), JobQueue(path)
+
+    assert first.last_worker_launch() is None
+    assert first.claim_worker_launch(min_interval=60)
+    # Another session sharing the queue must not launch more workers meanwhile
+    assert not second.claim_worker_launch(min_interval=60)
+    assert second.last_worker_launch() is not None
+    assert second.claim_worker_launch(min_interval=0)
@@ -0,0 +1,39 @@
+from keyword_clusters import cluster_keywords, dedupe_keywords, summarize_clusters
+from tools.semrush_parser import KeywordRecord
+
+
+def record(phrase, volume):
+    return KeywordRecord(phrase=phrase, volume=volume)
+
+
+def test_dedupe_keeps_the_highest_volume_variant():
+    kept = dedupe_keywords([
+        record("trailer insurance", 100),
+        record("insurance for trailers", 400),
+        record("the", 50),
+        record("boat insurance", 200),
+    ])
+
+    assert [(r.phrase, r.volume) for r in kept] == [("insurance for trailers", 400), ("boat insurance", 200)]
+
+
+def test_duplicate_volume_counts_towards_the_cluster():
+    clusters = cluster_keywords([
+        record("trailer insurance cost", 1000),
+        record("cost of trailer insurance", 300),
+        record("trailer insurance cost uk", 200),
+        record("trailer insurance costs uk", 150),
+        record("boat hire", 900),
+        record("boat hire prices", 400),
+    ])
+
+    trailer = next(c for c in clusters if c.label == "trailer insurance cost")
+    # Exact (word order, plural) and near duplicates leave the list but not the total
+    assert [k.phrase for k in trailer.keywords] == ["trailer insurance cost"]
+    assert trailer.volume == 1000 + 300 + 200 + 150
+    assert [c.volume for c in clusters] == sorted((c.volume for c in clusters), reverse=True)
+    assert "total volume 1650" in summarize_clusters(clusters)
+
+
+def test_no_records_no_clusters():
+    assert cluster_keywords([]) == []
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Asks a ChatOpenAI with an LLMResponseCache once, in a fresh interpreter
+SCRIPT = """
+import sys
+from langchain_openai import ChatOpenAI
+from llm_cache import LLMResponseCache
+mode, base_url, streaming = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+llm = ChatOpenAI(model="gpt-4o", api_key="test", base_url=base_url, max_retries=0, streaming=streaming,
+                 cache=LLMResponseCache(mode))
+print(llm.invoke("Write a meta title for trailer insurance").content)
+"""
+
+
+class OpenAIStubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "Trailer insurance, explained"},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 4, "total_tokens": 16},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(mode, base_url, cache_dir, streaming=False):
+    env = dict(os.environ, SEO_CACHE_DIR=str(cache_dir), PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable, "-c", SCRIPT, mode, base_url, "1" if streaming else "0"],
+        env=env, capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_recording_replays_in_another_process(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OpenAIStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    try:
+        recorded = run("record", base_url, tmp_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert recorded.returncode == 0, recorded.stderr
+    assert recorded.stdout.strip() == "Trailer insurance, explained"
+
+    # The stub is gone, so the answer can only come from the recording
+    replayed = run("replay", base_url, tmp_path, streaming=True)
+    assert replayed.returncode == 0, replayed.stderr
+    assert replayed.stdout.strip() == "Trailer insurance, explained"
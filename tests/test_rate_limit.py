@@ -0,0 +1,24 @@
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from model_routing import ModelRouter
+from tools.rate_limit import RateLimitCallbackHandler, RateLimiter
+
+
+def test_callback_throttles_chat_model_calls():
+    llm = FakeListChatModel(responses=["ok"], callbacks=[RateLimitCallbackHandler(RateLimiter(10, burst=1))])
+    started = time.monotonic()
+    for _ in range(4):
+        assert llm.invoke("hi").content == "ok"
+    # The first call uses the burst token, each further one waits ~0.1s
+    assert time.monotonic() - started >= 0.25
+
+
+def test_router_keeps_rate_limiter_out_of_request_arguments(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.delenv("CLAUDE_API_KEY", raising=False)
+    router = ModelRouter("OpenAI GPT-4o", rate_limiter=RateLimiter(1), routes={})
+    llm = router.llm("writer")
+    assert "rate_limiter" not in llm.model_kwargs
+    assert any(isinstance(c, RateLimitCallbackHandler) for c in llm.callbacks)
@@ -0,0 +1,57 @@
+import json
+import zipfile
+from xml.etree import ElementTree
+
+from brief_models import Competitor
+from report import Brief, render
+from tools.semrush_parser import KeywordRecord
+
+KEYWORD_RESEARCH = "## Keywords\n- trailer rental insurance (1300)\n- utility trailer insurance (880)"
+
+
+def brief(**kwargs):
+    related = [KeywordRecord(phrase="trailer insurance cost", volume=720, results=1000, trend=(0.5, 1.0), relevance=0.9)]
+    kwargs.setdefault("keyword_research", KEYWORD_RESEARCH)
+    return Brief("renting trailers insurance", "Small business owners", "Acme", related_keywords=related, **kwargs)
+
+
+def test_meta_title_and_description_fall_back_to_the_focus_keyword():
+    b = brief()
+    assert b.meta_title == "Renting trailers insurance | Acme"
+    assert b.meta_description == "Optimize your landing page for renting trailers insurance and attract Small business owners."
+    assert brief(meta_title="Trailer cover, explained").meta_title == "Trailer cover, explained"
+
+
+def test_keyword_research_gets_its_own_section_next_to_competitors(tmp_path):
+    b = brief(competitors=[Competitor(name="Rentco", url="rentco.com")])
+    text = open(render(b, str(tmp_path / "brief.md"), "md"), encoding="utf-8").read()
+    assert "Rentco" in text
+    assert "Keyword Research" in text
+    assert "utility trailer insurance (880)" in text
+    assert "trailer insurance cost" in text
+
+
+def test_raw_task_json_is_never_rendered_as_body_text(tmp_path):
+    raw = json.dumps({"meta_title": "x", "meta_description": "y", "competitors": []})
+    b = brief(keyword_research=raw)
+    for fmt in ("md", "html", "docx", "json"):
+        render(b, str(tmp_path / f"brief.{fmt}"), fmt)
+    text = open(tmp_path / "brief.md", encoding="utf-8").read()
+    assert '"meta_title"' not in text
+    assert "No competitors were extracted for this brief." in text
+    assert "Keyword Research" not in text
+    assert json.load(open(tmp_path / "brief.json", encoding="utf-8"))["keyword_research"] is None
+
+
+def test_every_format_escapes_the_meta_title(tmp_path):
+    b = brief(meta_title="Trailers & insurance <2024> | Acme", headlines="# Renting trailers\n## Costs & cover")
+    paths = {fmt: render(b, str(tmp_path / f"brief.{fmt}"), fmt) for fmt in ("docx", "md", "html", "json")}
+
+    with zipfile.ZipFile(paths["docx"]) as docx:
+        document = ElementTree.fromstring(docx.read("word/document.xml"))
+    text = "".join(node.text or "" for node in document.iter() if node.tag.endswith("}t"))
+    assert "Trailers & insurance <2024> | Acme" in text
+    assert "Costs & cover" in text
+    html = open(paths["html"], encoding="utf-8").read()
+    assert "<title>Trailers &amp; insurance &lt;2024&gt; | Acme</title>" in html
+    assert json.load(open(paths["json"], encoding="utf-8"))["meta_title"] == "Trailers & insurance <2024> | Acme"
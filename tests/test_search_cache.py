@@ -0,0 +1,53 @@
+from tools import disk_cache, search_cache
+from tools.search_cache import SearchCache, has_search_hits
+from tools.tracing import Tracer
+
+HITS = "Title: Trailer insurance\nLink: https://example.com\nSnippet: What it covers\n---"
+ERROR = {"message": "Not enough credits", "statusCode": 400}
+
+
+def test_error_responses_are_not_cached():
+    cache = SearchCache()
+    answers = iter([ERROR, HITS, "unused"])
+
+    assert cache.fetch(("trailer insurance",), lambda: next(answers), cacheable=has_search_hits) == ERROR
+    assert cache.fetch(("trailer insurance",), lambda: next(answers), cacheable=has_search_hits) == HITS
+    # Search hits are cached as before
+    assert cache.fetch(("trailer insurance",), lambda: next(answers), cacheable=has_search_hits) == HITS
+    assert cache.stats()["misses"] == 2
+
+
+def test_stored_error_responses_are_fetched_again():
+    cache = SearchCache()
+    cache.disk.set(["trailer insurance"], ERROR)
+    assert cache.fetch(("trailer insurance",), lambda: HITS, cacheable=has_search_hits) == HITS
+    assert cache.disk.get(["trailer insurance"]) == HITS
+
+
+def test_memo_entries_expire_with_the_disk_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    cache = SearchCache(ttl=60)
+    answers = iter([HITS, HITS + "\nfresh"])
+
+    assert cache.fetch(("trailer insurance",), lambda: next(answers)) == HITS
+    now[0] += 30
+    assert cache.fetch(("trailer insurance",), lambda: next(answers)) == HITS
+    now[0] += 31
+    assert cache.fetch(("trailer insurance",), lambda: next(answers)) == HITS + "\nfresh"
+    assert cache.stats()["memo_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_stats_per_run():
+    cache = SearchCache()
+    cache.fetch(("trailer insurance",), lambda: HITS)
+    run = Tracer()
+    with run.activate():
+        cache.fetch(("trailer insurance",), lambda: HITS)
+        cache.fetch(("trailer rental",), lambda: HITS)
+
+    stats = cache.stats(run)
+    assert (stats["memo_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,101 @@
+import pytest
+
+from benchmarks.semrush_server import SemrushStubServer
+from tools import semrush_prefetch
+from tools.semrush_client import SemrushClient
+from tools.semrush_parser import SemrushError
+from tools.semrush_prefetch import PAGE_SIZE, SemrushPrefetch, fetch_report, iter_report
+
+
+def test_fetch_report_pages_through_stub_server():
+    with SemrushStubServer() as server:
+        client = SemrushClient(api_key="test", base_url=server.url)
+        records = list(iter_report("test", "related_keywords", "trailer insurance", "us", limit=25, page_size=10,
+                                   client=client))
+        questions = fetch_report("test", "qa", "trailer insurance", "us", client=client)
+
+    assert len(records) == 25
+    assert records[0].phrase == "trailer insurance variant 0"
+    assert records[24].phrase == "trailer insurance variant 24"
+    assert records[0].volume == 1000
+    assert len(questions) == 10
+    assert questions[0].phrase.startswith("how much does trailer insurance cost")
+
+
+def test_paging_stops_at_a_short_page_and_pages_are_cached():
+    header = "Keyword;Search Volume;Number of Results;Trends"
+    rows = [f"trailer insurance {i};{1000 - i};100;0.5,1" for i in range(13)]
+
+    class PagingClient:
+        def __init__(self):
+            self.offsets = []
+
+        def report(self, params, timeout=None, **kwargs):
+            self.offsets.append(params["display_offset"])
+            start = params["display_offset"]
+            return FakeResponse("\r\n".join([header] + rows[start:start + params["display_limit"]]))
+
+    client = PagingClient()
+    records = fetch_report("test", "qa", "trailer insurance", "us", client=client, limit=50)
+    again = list(iter_report("test", "qa", "trailer insurance", "us", limit=50, page_size=PAGE_SIZE, client=client))
+
+    assert client.offsets == [0]
+    assert [r.phrase for r in records] == [f"trailer insurance {i}" for i in range(13)]
+    assert [r.volume for r in again] == [r.volume for r in records]
+    assert records[0].trend == (0.5, 1.0)
+
+    client.offsets.clear()
+    paged = list(iter_report("test", "qa", "trailer insurance", "uk", limit=50, page_size=5, client=client))
+    assert client.offsets == [0, 5, 10]
+    assert len(paged) == 13
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+        self.encoding = "utf-8"
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.body.split("\r\n"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeClient:
+    def __init__(self, body):
+        self.body = body
+        self.calls = 0
+
+    def report(self, params, timeout=None, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.body)
+
+
+def test_nothing_found_is_an_empty_report():
+    client = FakeClient("ERROR 50 :: NOTHING FOUND")
+
+    assert fetch_report("test", "qa", "trailer insurance", "us", client=client) == []
+    assert fetch_report("test", "qa", "trailer insurance", "us", client=client) == []
+    assert client.calls == 1
+
+
+def test_other_errors_raise_and_are_not_cached():
+    client = FakeClient("ERROR 132 :: API UNITS BALANCE IS ZERO")
+
+    for _ in range(2):
+        with pytest.raises(SemrushError, match="API UNITS BALANCE IS ZERO"):
+            fetch_report("test", "qa", "trailer insurance", "us", client=client)
+    assert client.calls == 2
+
+
+def test_prefetch_reports_error_bodies(monkeypatch):
+    monkeypatch.setattr(semrush_prefetch, "get_client", lambda: FakeClient("ERROR 132 :: API UNITS BALANCE IS ZERO"))
+
+    data, errors = SemrushPrefetch("test", "trailer insurance", "us", reports=["qa"]).results()
+
+    assert data == {"qa": []}
+    assert isinstance(errors["qa"], SemrushError)
@@ -0,0 +1,41 @@
+import uuid
+
+from tools.streaming import AnswerStream, StreamingCallbackHandler, streaming_task
+
+
+def stream_call(handler, tokens):
+    run_id = uuid.uuid4()
+    handler.on_chat_model_start({}, [[]], run_id=run_id)
+    for token in tokens:
+        handler.on_llm_new_token(token, run_id=run_id)
+    handler.on_llm_end(None, run_id=run_id)
+
+
+def test_only_the_final_answer_is_forwarded():
+    received = []
+    handler = StreamingCallbackHandler()
+    with AnswerStream(lambda task, text: received.append((task, text)), task="outline").activate():
+        # The marker arrives split over tokens, as the models stream it
+        stream_call(handler, ["Thought: I now know", " the final answer\nFinal", " Ans", "wer:", "  # Trailer", " insurance"])
+
+    assert received == [("outline", "# Trailer"), ("outline", " insurance")]
+
+
+def test_a_second_answer_for_a_task_restarts_it():
+    received = []
+    handler = StreamingCallbackHandler()
+    with AnswerStream(lambda task, text: received.append((task, text))).activate():
+        with streaming_task("technical_seo"):
+            stream_call(handler, ["Final Answer: {\"meta", "_title\""])
+            # e.g. a retry after the answer failed to parse
+            stream_call(handler, ["Final Answer: {}"])
+
+    assert received == [
+        ("technical_seo", "{\"meta"), ("technical_seo", "_title\""), ("technical_seo", None), ("technical_seo", "{}"),
+    ]
+
+
+def test_calls_outside_a_stream_are_ignored():
+    handler = StreamingCallbackHandler()
+    stream_call(handler, ["Final Answer: hello"])
+    assert handler._calls == {}
@@ -0,0 +1,19 @@
+import pytest
+
+from brief_pipeline import TASK_DEPENDENCIES
+from task_graph import TaskGraph, TaskNode
+
+
+def test_brief_tasks_run_after_keyword_research():
+    graph = TaskGraph(TaskNode(name, None, depends_on) for name, depends_on in TASK_DEPENDENCIES.items())
+
+    order = graph.order()
+    assert order[0] == "keyword_research"
+    assert set(order[1:]) == {"outline", "technical_seo"}
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        TaskGraph([TaskNode("a", None, ["b"]), TaskNode("b", None, ["a"])]).order()
+    with pytest.raises(ValueError, match="unknown"):
+        TaskGraph([TaskNode("a", None, ["missing"])]).order()
@@ -0,0 +1,42 @@
+import pytest
+
+from tools import tokens
+from tools.compact import compact_table
+from tools.tokens import count_tokens, truncate_to_tokens
+
+
+@pytest.fixture
+def no_tiktoken(monkeypatch):
+    monkeypatch.setattr(tokens, "tiktoken", None)
+    monkeypatch.setattr(tokens, "_encodings", {})
+
+
+def test_estimates_four_characters_per_token_without_tiktoken(no_tiktoken):
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde", model="claude-3-opus") == 2
+    assert truncate_to_tokens("x" * 8, 2) == "x" * 8
+    assert truncate_to_tokens("x" * 9, 2) == "x" * 8 + "\n[...truncated]"
+
+
+def test_offline_tiktoken_falls_back_to_the_estimate(monkeypatch):
+    class OfflineTiktoken:
+        @staticmethod
+        def encoding_for_model(model):
+            raise OSError("no network to fetch the BPE file")
+
+    monkeypatch.setattr(tokens, "tiktoken", OfflineTiktoken)
+    monkeypatch.setattr(tokens, "_encodings", {})
+    assert count_tokens("abcdefgh", model="gpt-4o") == 2
+
+
+def test_compact_table_keeps_to_the_token_cap(no_tiktoken):
+    rows = [[f"trailer insurance variant {i}", 1000 - i] for i in range(50)]
+
+    text = compact_table(["keyword", "volume"], rows, max_rows=50, max_tokens=60)
+
+    lines = text.splitlines()
+    assert lines[0] == "keyword\tvolume"
+    assert count_tokens("\n".join(lines[:-1])) <= 60
+    kept = len(lines) - 2
+    assert lines[-1] == f"+{50 - kept} more rows (volume total {sum(v for _, v in rows[kept:])})"
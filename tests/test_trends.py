@@ -0,0 +1,53 @@
+import math
+
+from tools.trends import SUMMARY_COLUMNS, GoogleTrendsTool, TrendsService, summarize_series
+
+WEEK = 7 * 24 * 3600
+START = 1577836800  # 2020-01-01
+
+
+def weekly_series(weeks=260, scale=1.0):
+    timestamps = [START + i * WEEK for i in range(weeks)]
+    # Rising interest that peaks every July
+    values = [scale * (50 + i / 10 + 20 * math.cos(2 * math.pi * (i - 27) / 52.18)) for i in range(weeks)]
+    return timestamps, values
+
+
+def test_summary_is_scale_free():
+    summary = summarize_series(*weekly_series())
+
+    assert summary["peak_month"] == "Jul"
+    assert summary["slope_%/yr"] > 0
+    assert summary["yoy_%"] > 0
+    assert summary["seasonality_%"] > 0
+    # The same keyword fetched in another batch comes back with another scale
+    assert summarize_series(*weekly_series(scale=0.37)) == summary
+    assert set(summary) == set(SUMMARY_COLUMNS[1:])
+
+
+def test_flat_or_short_series_have_no_summary():
+    assert summarize_series([START], [40]) is None
+    assert summarize_series([START, START + WEEK], [0, 0]) is None
+
+
+def test_tool_fetches_each_keyword_once():
+    requests = []
+
+    class FakeClient:
+        def __init__(self, params):
+            requests.append(params["q"])
+            self.keywords = params["q"].split(",")
+
+        def get_dict(self):
+            timestamps, values = weekly_series()
+            return {"interest_over_time": {"timeline_data": [
+                {"timestamp": str(t), "values": [{"query": k, "extracted_value": round(v)} for k in self.keywords]}
+                for t, v in zip(timestamps, values)
+            ]}}
+
+    tool = GoogleTrendsTool(service=TrendsService(api_key="test", client_factory=FakeClient))
+    first = tool._run("trailer insurance, trailer rental")
+    second = tool._run("Trailer  Insurance")
+
+    assert requests == ["trailer insurance,trailer rental"]
+    assert "Jul" in first and "Jul" in second
@@ -0,0 +1,30 @@
+import threading
+import time
+
+from worker_pool import BriefWorkerPool
+
+
+def test_dead_worker_fails_its_job_while_events_keep_arriving(tmp_path, monkeypatch):
+    # Workers inherit the working directory; keep their Results/ out of the repo
+    monkeypatch.chdir(tmp_path)
+    pool = BriefWorkerPool(workers=1)
+    stop = threading.Event()
+
+    def chatter():
+        # Another job streaming tokens keeps the event queue from ever going idle
+        while not stop.is_set():
+            pool._events.put(("token", "other-job", ("outline", "x")))
+            time.sleep(0.01)
+
+    threading.Thread(target=chatter, daemon=True).start()
+    try:
+        job = pool.submit({"focus_keyword": "trailer insurance"})
+        # Killed before it can report "started": the pool still knows it had the job
+        pool._workers[0].process.kill()
+        job._finished.wait(timeout=30)
+        assert job.status == "failed"
+        assert "exited unexpectedly" in job.error
+        assert pool._workers[0].process.is_alive()
+    finally:
+        stop.set()
+        pool.shutdown()
@@ -0,0 +1,76 @@
+import os
+import time
+
+from tools.tokens import count_tokens
+from tools.tracing import current_tracer
+
+# Caps for every table handed to an agent; rows beyond them become one summary line
+TOOL_OUTPUT_MAX_ROWS = int(os.getenv("TOOL_OUTPUT_MAX_ROWS", 25))
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", 1500))
+# When set, every compacted output is also rendered the old verbose way and
+# the token difference is recorded on the active tracer
+TOOL_OUTPUT_MEASURE = os.getenv("TOOL_OUTPUT_MEASURE", "0") == "1"
+
+
+def _cell(value):
+  if value is None:
+    return ""
+  if isinstance(value, float):
+    return f"{value:g}"
+  return " ".join(str(value).split()).replace("\t", " ")
+
+
+def _tail_summary(columns, rows):
+  """One line describing omitted rows, with totals of their numeric columns."""
+  totals = []
+  for i, column in enumerate(columns):
+    values = [row[i] for row in rows if i < len(row)]
+    if values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+      totals.append(f"{column} total {sum(values):g}")
+  suffix = f" ({', '.join(totals)})" if totals else ""
+  return f"+{len(rows)} more rows{suffix}"
+
+
+def compact_table(columns, rows, title=None, max_rows=None, max_tokens=None, model=None):
+  """
+  Renders rows as a tab-separated table with one header line. Only the
+  first rows that fit `max_rows` and `max_tokens` are kept (pass rows
+  sorted by importance); the rest are summarized in a final line.
+  """
+  max_rows = TOOL_OUTPUT_MAX_ROWS if max_rows is None else max_rows
+  max_tokens = TOOL_OUTPUT_MAX_TOKENS if max_tokens is None else max_tokens
+  rows = [list(row) for row in rows]
+  lines = [title] if title else []
+  lines.append("\t".join(columns))
+  used = count_tokens("\n".join(lines), model)
+  kept = 0
+  for row in rows[:max_rows]:
+    line = "\t".join(_cell(v) for v in row)
+    cost = count_tokens(line, model) + 1
+    if used + cost > max_tokens:
+      break
+    lines.append(line)
+    used += cost
+    kept += 1
+  if kept < len(rows):
+    lines.append(_tail_summary(columns, rows[kept:]))
+  return "\n".join(lines)
+
+
+def measure(name, compact, verbose, model=None):
+  """
+  Records how many tokens `compact` saves over `verbose` (a string or a
+  zero-argument callable producing it) when TOOL_OUTPUT_MEASURE is on.
+  Returns `compact` so it can wrap a return statement.
+  """
+  tracer = current_tracer()
+  if not TOOL_OUTPUT_MEASURE or tracer is None:
+    return compact
+  verbose = verbose() if callable(verbose) else verbose
+  verbose_tokens, compact_tokens = count_tokens(verbose, model), count_tokens(compact, model)
+  now = time.time()
+  tracer.record(
+    "format", name, now, now,
+    verbose_tokens=verbose_tokens, compact_tokens=compact_tokens, tokens_saved=verbose_tokens - compact_tokens,
+  )
+  return compact
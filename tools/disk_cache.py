@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.getenv("SEO_CACHE_DIR", ".cache")
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class DiskCache:
+  """
+  Single-file SQLite key/value store with TTL expiry and LRU eviction by
+  entry count and, optionally, by total stored bytes.
+
+  Keys are any JSON-serialisable value (tuples are stored as lists) and
+  values must be JSON-serialisable. Safe to share between threads and
+  between processes pointing at the same file.
+  """
+
+  def __init__(self, path, ttl=None, max_entries=1000, max_bytes=None):
+    self.path = path
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+    self._lock = threading.Lock()
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute(
+      "CREATE TABLE IF NOT EXISTS entries ("
+      " key TEXT PRIMARY KEY,"
+      " value TEXT NOT NULL,"
+      " created REAL NOT NULL,"
+      " accessed REAL NOT NULL,"
+      " size INTEGER NOT NULL DEFAULT 0)"
+    )
+    try:
+      self._conn.execute("ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+    except sqlite3.OperationalError:
+      pass  # column already present
+    self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+    self._conn.commit()
+
+  @staticmethod
+  def make_key(key):
+    return json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+
+  def get(self, key):
+    """Returns the cached value, or None on a miss or expired entry."""
+    entry = self.get_entry(key)
+    return entry[0] if entry is not None else None
+
+  def get_entry(self, key):
+    """Returns (value, created timestamp), or None on a miss or expired entry."""
+    key = self.make_key(key)
+    now = time.time()
+    with self._lock:
+      row = self._conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+      if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._conn.commit()
+        row = None
+      if row is None:
+        self.misses += 1
+        return None
+      self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+      self._conn.commit()
+      self.hits += 1
+    return json.loads(row[0]), row[1]
+
+  def set(self, key, value):
+    key = self.make_key(key)
+    value = json.dumps(value)
+    now = time.time()
+    with self._lock:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO entries (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+        (key, value, now, now, len(value)),
+      )
+      self._evict()
+      self._conn.commit()
+
+  def get_or_set(self, key, compute):
+    value = self.get(key)
+    if value is None:
+      value = compute()
+      if value is not None:
+        self.set(key, value)
+    return value
+
+  def _evict(self):
+    if self.ttl is not None:
+      self._conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,))
+    if self.max_entries is not None:
+      self._conn.execute(
+        "DELETE FROM entries WHERE key IN ("
+        " SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+        (self.max_entries,),
+      )
+    if self.max_bytes is not None:
+      total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+      if total > self.max_bytes:
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+          self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+          total -= size
+          if total <= self.max_bytes:
+            break
+
+  def clear(self):
+    with self._lock:
+      self._conn.execute("DELETE FROM entries")
+      self._conn.commit()
+
+  def __len__(self):
+    with self._lock:
+      return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+  def stats(self):
+    total = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_rate": self.hits / total if total else 0.0,
+      "entries": len(self),
+    }
+
+
+def get_cache(name, ttl=None, max_entries=1000, max_bytes=None):
+  """Returns the process-wide DiskCache stored at <CACHE_DIR>/<name>.sqlite."""
+  with _caches_lock:
+    if name not in _caches:
+      _caches[name] = DiskCache(
+        os.path.join(CACHE_DIR, f"{name}.sqlite"), ttl=ttl, max_entries=max_entries, max_bytes=max_bytes
+      )
+    return _caches[name]
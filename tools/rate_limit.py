@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+try:
+  from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+  BaseCallbackHandler = object
+
+
+class RateLimiter:
+  """
+  Thread-safe token bucket: `rate` tokens are added per second up to
+  `burst`. One instance can be shared by every worker thread; chat models
+  use it through RateLimitCallbackHandler.
+  """
+
+  def __init__(self, rate, burst=None):
+    self.rate = float(rate)
+    self.burst = float(burst if burst is not None else max(1.0, rate))
+    self._tokens = self.burst
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+  def _try_take(self, cost):
+    with self._lock:
+      now = time.monotonic()
+      self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+      self._updated = now
+      if self._tokens >= cost:
+        self._tokens -= cost
+        return 0.0
+      return (cost - self._tokens) / self.rate
+
+  def acquire(self, *, blocking=True, cost=1):
+    while True:
+      wait = self._try_take(cost)
+      if wait == 0.0:
+        return True
+      if not blocking:
+        return False
+      time.sleep(wait)
+
+  async def aacquire(self, *, blocking=True, cost=1):
+    while True:
+      wait = self._try_take(cost)
+      if wait == 0.0:
+        return True
+      if not blocking:
+        return False
+      await asyncio.sleep(wait)
+
+
+class RateLimitCallbackHandler(BaseCallbackHandler):
+  """
+  LangChain callback that takes a token from `rate_limiter` before every
+  chat model call, blocking the calling thread until one is available.
+
+  The langchain_core that crewai 0.30 needs has no `rate_limiter=` field on
+  chat models (it would be sent to the provider as a request argument), so
+  the limit is applied from the callbacks instead. Calls answered from the
+  LLM cache are counted too, since the callback runs before the lookup.
+  """
+
+  def __init__(self, rate_limiter):
+    self.rate_limiter = rate_limiter
+
+  def on_chat_model_start(self, serialized, messages, **kwargs):
+    self.rate_limiter.acquire()
+
+  def on_llm_start(self, serialized, prompts, **kwargs):
+    self.rate_limiter.acquire()
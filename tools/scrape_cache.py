@@ -0,0 +1,126 @@
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup
+from crewai_tools import ScrapeWebsiteTool
+from requests.adapters import HTTPAdapter
+
+from tools.disk_cache import get_cache
+from tools.tokens import truncate_to_tokens
+
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", 7 * 24 * 3600))
+SCRAPE_CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+# Pages younger than this are served without asking the site again
+SCRAPE_FRESH_SECONDS = int(os.getenv("SCRAPE_FRESH_SECONDS", 6 * 3600))
+SCRAPE_MAX_TOKENS = int(os.getenv("SCRAPE_MAX_TOKENS", 3000))
+
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form", "nav", "header", "footer", "aside"]
+_boilerplate_attr = re.compile(r"cookie|consent|banner|newsletter|subscribe|share|social|breadcrumb|sidebar|menu|popup|modal", re.I)
+_blank_lines = re.compile(r"\n\s*\n+")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+  global _session
+  with _session_lock:
+    if _session is None:
+      session = requests.Session()
+      adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+      session.mount("https://", adapter)
+      session.mount("http://", adapter)
+      _session = session
+    return _session
+
+
+def normalize_url(url):
+  """Canonical form used as cache key: lower-case host, no fragment, default port, tracking params or trailing slash."""
+  parts = urlsplit(url.strip())
+  scheme = (parts.scheme or "https").lower()
+  host = (parts.hostname or "").lower()
+  if parts.port and not (scheme == "http" and parts.port == 80 or scheme == "https" and parts.port == 443):
+    host = f"{host}:{parts.port}"
+  path = parts.path or "/"
+  if len(path) > 1:
+    path = path.rstrip("/")
+  query = urlencode(sorted(
+    (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+    if not k.lower().startswith("utm_") and k.lower() not in ("gclid", "fbclid")
+  ))
+  return urlunsplit((scheme, host, path, query, ""))
+
+
+def extract_main_content(html):
+  """Returns the readable main text of a page without navigation, ads and other boilerplate."""
+  soup = BeautifulSoup(html, "html.parser")
+  for tag in soup(BOILERPLATE_TAGS):
+    tag.decompose()
+  for tag in soup.find_all(attrs={"class": _boilerplate_attr}) + soup.find_all(attrs={"id": _boilerplate_attr}):
+    if tag.name not in ("html", "body", "main", "article"):
+      tag.decompose()
+  root = soup.find("main") or soup.find("article") or soup.find(attrs={"role": "main"}) or soup.body or soup
+  lines, seen = [], set()
+  for line in root.get_text("\n").splitlines():
+    line = " ".join(line.split())
+    # Repeated short lines are almost always menus or widgets
+    if not line or (line in seen and len(line) < 80):
+      continue
+    seen.add(line)
+    lines.append(line)
+  title = soup.title.get_text(strip=True) if soup.title else ""
+  text = "\n".join(lines)
+  return _blank_lines.sub("\n\n", f"{title}\n\n{text}" if title else text)
+
+
+def scrape(url, headers=None, cookies=None, timeout=(5, 20)):
+  """
+  Fetches the main content of `url` through the on-disk scrape cache.
+
+  Fresh entries are returned as is; stale ones are revalidated with
+  If-None-Match / If-Modified-Since and only re-extracted when changed.
+  """
+  cache = get_cache("scrape", ttl=SCRAPE_CACHE_TTL, max_entries=None, max_bytes=SCRAPE_CACHE_MAX_BYTES)
+  key = normalize_url(url)
+  entry = cache.get(key)
+  if entry is not None and time.time() - entry["checked"] < SCRAPE_FRESH_SECONDS:
+    return entry["content"]
+
+  request_headers = dict(headers or {})
+  if entry is not None:
+    if entry.get("etag"):
+      request_headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+      request_headers["If-Modified-Since"] = entry["last_modified"]
+  response = get_session().get(url, headers=request_headers, cookies=cookies, timeout=timeout)
+  if response.status_code == 304 and entry is not None:
+    entry["checked"] = time.time()
+    cache.set(key, entry)
+    return entry["content"]
+  response.raise_for_status()
+  response.encoding = response.apparent_encoding
+  content = extract_main_content(response.text)
+  cache.set(key, {
+    "content": content,
+    "etag": response.headers.get("ETag"),
+    "last_modified": response.headers.get("Last-Modified"),
+    "checked": time.time(),
+  })
+  return content
+
+
+class CachedScrapeWebsiteTool(ScrapeWebsiteTool):
+  """
+  Drop-in ScrapeWebsiteTool that serves pages from the scrape cache,
+  strips boilerplate and caps the returned text at `max_tokens`.
+  """
+  max_tokens: int = SCRAPE_MAX_TOKENS
+
+  def _run(self, **kwargs):
+    website_url = kwargs.get('website_url', self.website_url)
+    content = scrape(website_url, headers=self.headers, cookies=self.cookies)
+    return truncate_to_tokens(content, self.max_tokens)
@@ -0,0 +1,174 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from crewai_tools import SerperDevTool
+
+from tools.compact import compact_table, measure
+from tools.disk_cache import get_cache
+from tools.tracing import current_tracer
+
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 24 * 3600))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 5000))
+# Queries with at most this many words are treated as bags of words
+SHORT_QUERY_WORDS = 6
+
+_operator = re.compile(r'"|\b(site|intitle|inurl|filetype|related):|(^|\s)[-+]\w|\bOR\b')
+_punctuation = re.compile(r"[^\w\s'\"\-:+.]", re.UNICODE)
+_search_result = re.compile(r"Title: (.*)\nLink: (.*)\nSnippet: (.*)\n---")
+
+
+def normalize_query(query):
+  """
+  Canonical form of a search query: case and whitespace folded, trailing
+  punctuation dropped, and the words of short queries sorted so that
+  "trailer insurance cost" and "Cost of trailer insurance?" can match.
+  Queries using search operators keep their word order.
+  """
+  if _operator.search(query):
+    return " ".join(query.split()).lower()
+  words = _punctuation.sub(" ", query.lower()).split()
+  if len(words) <= SHORT_QUERY_WORDS:
+    words = sorted(w for w in words if w not in ("a", "an", "the", "of", "for", "in", "and", "to"))
+  return " ".join(words)
+
+
+class SearchCache:
+  """
+  Two-level cache for search results with in-flight de-duplication.
+
+  An in-memory LRU memo sits in front of a persistent TTL DiskCache, and
+  concurrent requests for the same normalized query share one upstream call.
+  Memo entries expire together with their disk entry. Each lookup is also
+  recorded as a "cache" record on the active Tracer, so stats(tracer) gives
+  the counts of one run.
+  """
+
+  def __init__(self, memo_size=512, ttl=SEARCH_CACHE_TTL):
+    self.memo = OrderedDict()
+    self.memo_size = memo_size
+    self.ttl = ttl
+    self.in_flight = {}
+    self._lock = threading.Lock()
+    self.counts = {"memo_hits": 0, "disk_hits": 0, "merged": 0, "misses": 0}
+
+  @property
+  def disk(self):
+    return get_cache("search", ttl=self.ttl, max_entries=SEARCH_CACHE_MAX_ENTRIES)
+
+  def _count(self, outcome):
+    with self._lock:
+      self.counts[outcome] += 1
+    tracer = current_tracer()
+    if tracer is not None:
+      now = time.time()
+      tracer.record("cache", "search", now, now, outcome=outcome)
+
+  def fetch(self, key, compute, cacheable=None):
+    """
+    Returns the value for `key`, calling `compute()` on a miss. With
+    `cacheable`, values it rejects are returned to the waiting callers but
+    never stored, and stored ones it rejects are computed again.
+    """
+    with self._lock:
+      entry = self.memo.get(key)
+      if entry is not None and entry[0] <= time.time():
+        del self.memo[key]
+        entry = None
+      if entry is None:
+        future = self.in_flight.get(key)
+        owner = future is None
+        if owner:
+          future = self.in_flight[key] = Future()
+      else:
+        self.memo.move_to_end(key)
+    if entry is not None:
+      self._count("memo_hits")
+      return entry[1]
+    if not owner:
+      self._count("merged")
+      return future.result()
+
+    try:
+      stored = self.disk.get_entry(list(key))
+      if stored is not None and (cacheable is None or cacheable(stored[0])):
+        value, created = stored
+        self._count("disk_hits")
+        self._remember(key, value, created)
+      else:
+        value = compute()
+        self._count("misses")
+        if cacheable is None or cacheable(value):
+          self.disk.set(list(key), value)
+          self._remember(key, value, time.time())
+      future.set_result(value)
+      return value
+    except Exception as e:
+      future.set_exception(e)
+      raise
+    finally:
+      with self._lock:
+        self.in_flight.pop(key, None)
+
+  def _remember(self, key, value, created):
+    expires = created + self.ttl if self.ttl is not None else float("inf")
+    with self._lock:
+      self.memo[key] = (expires, value)
+      self.memo.move_to_end(key)
+      while len(self.memo) > self.memo_size:
+        self.memo.popitem(last=False)
+
+  def stats(self, tracer=None):
+    """Lookup counts and hit rate of `tracer`'s run, or of the whole process without one."""
+    if tracer is not None:
+      counts = dict.fromkeys(self.counts, 0)
+      for r in tracer.records:
+        if r["kind"] == "cache" and r["name"] == "search":
+          counts[r["outcome"]] += 1
+    else:
+      with self._lock:
+        counts = dict(self.counts)
+    total = sum(counts.values())
+    counts["hit_rate"] = (total - counts["misses"]) / total if total else 0.0
+    return counts
+
+
+search_cache = SearchCache()
+
+
+def has_search_hits(results):
+  """
+  Whether a SerperDevTool answer holds search results. Without "organic"
+  results (e.g. a quota or auth error) it returns Serper's raw response
+  dict, which must not be cached.
+  """
+  return isinstance(results, str) and _search_result.search(results) is not None
+
+
+def compact_search_results(results):
+  """Turns SerperDevTool's Title:/Link:/Snippet: blocks into one compact table."""
+  if not isinstance(results, str):
+    return results
+  rows = _search_result.findall(results)
+  if not rows:
+    return results
+  return measure("search", compact_table(["title", "link", "snippet"], rows, title="Search results:"), results)
+
+
+class CachedSerperDevTool(SerperDevTool):
+  """SerperDevTool that answers repeated and near-identical queries from search_cache."""
+
+  def _run(self, **kwargs):
+    query = kwargs.get('search_query') or kwargs.get('query') or ""
+    key = (
+      normalize_query(query),
+      getattr(self, "n_results", None),
+      getattr(self, "country", None),
+      getattr(self, "location", None),
+      getattr(self, "locale", None),
+    )
+    results = search_cache.fetch(key, lambda: SerperDevTool._run(self, **kwargs), cacheable=has_search_hits)
+    return compact_search_results(results)
@@ -0,0 +1,161 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.disk_cache import get_cache
+from tools.rate_limit import RateLimiter
+from tools.tracing import trace_span
+
+SEMRUSH_API_URL = os.getenv("SEMRUSH_API_URL", "https://api.semrush.com/")
+# SEMrush allows 10 requests per second per API key
+SEMRUSH_REQUESTS_PER_SECOND = float(os.getenv("SEMRUSH_REQUESTS_PER_SECOND", 10))
+SEMRUSH_TIMEOUT = (float(os.getenv("SEMRUSH_CONNECT_TIMEOUT", 5)), float(os.getenv("SEMRUSH_READ_TIMEOUT", 30)))
+SEMRUSH_MAX_RETRIES = int(os.getenv("SEMRUSH_MAX_RETRIES", 4))
+# Requests in flight at once for one batched call; the rate limiter still applies
+SEMRUSH_CONCURRENCY = int(os.getenv("SEMRUSH_CONCURRENCY", 8))
+
+SEMRUSH_CACHE_TTL = int(os.getenv("SEMRUSH_CACHE_TTL", 7 * 24 * 3600))
+SEMRUSH_CACHE_MAX_ENTRIES = int(os.getenv("SEMRUSH_CACHE_MAX_ENTRIES", 5000))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SemrushClient:
+  """
+  Keep-alive HTTP client for every SEMrush call.
+
+  Requests go through one pooled Session and a token-bucket RateLimiter
+  shared by all threads. 429/5xx answers and connection errors are retried
+  with exponential backoff (honouring Retry-After).
+  """
+
+  def __init__(self, api_key=None, base_url=SEMRUSH_API_URL, timeout=SEMRUSH_TIMEOUT,
+               max_retries=SEMRUSH_MAX_RETRIES, backoff=0.5, rate_limiter=None, pool_size=16):
+    self.api_key = api_key
+    self.base_url = base_url
+    self.timeout = timeout
+    self.max_retries = max_retries
+    self.backoff = backoff
+    self.rate_limiter = rate_limiter or RateLimiter(SEMRUSH_REQUESTS_PER_SECOND)
+    self.session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    self.session.mount("https://", adapter)
+    self.session.mount("http://", adapter)
+
+  @property
+  def key(self):
+    return self.api_key or os.getenv("SEMRUSH_API_KEY")
+
+  def _delay(self, attempt, response=None):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+      try:
+        return float(retry_after)
+      except ValueError:
+        pass
+    return self.backoff * (2 ** attempt) * (1 + random.random() / 2)
+
+  def request(self, method, url, timeout=None, **kwargs):
+    for attempt in range(self.max_retries + 1):
+      self.rate_limiter.acquire()
+      try:
+        response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+      except (requests.ConnectionError, requests.Timeout):
+        if attempt == self.max_retries:
+          raise
+        time.sleep(self._delay(attempt))
+        continue
+      if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+        time.sleep(self._delay(attempt, response))
+        continue
+      response.raise_for_status()
+      return response
+
+  def report(self, params, timeout=None, **kwargs):
+    """
+    GET one of the analytics v1 reports (phrase_related, phrase_questions,
+    ...). Extra keyword arguments such as stream=True go to requests.
+    """
+    params = dict(params)
+    params["key"] = params.get("key") or self.key
+    return self.request("GET", self.base_url, params=params, timeout=timeout, **kwargs)
+
+  def traffic_analytics(self, endpoint, payload, timeout=None):
+    """POST to analytics/ta/api/v3/<endpoint> and return the decoded JSON."""
+    headers = {
+      'X-API-KEY': self.key,
+      'Content-Type': 'application/json'
+    }
+    url = self.base_url.rstrip("/") + "/analytics/ta/api/v3/" + endpoint
+    return self.request("POST", url, headers=headers, json=payload, timeout=timeout).json()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+  """Returns the process-wide SemrushClient shared by all tools and workers."""
+  global _client
+  with _client_lock:
+    if _client is None:
+      _client = SemrushClient()
+    return _client
+
+
+def set_rate_limiter(rate_limiter):
+  """Replaces the shared client's rate limiter and returns the previous one."""
+  client = get_client()
+  previous, client.rate_limiter = client.rate_limiter, rate_limiter
+  return previous
+
+
+def get_semrush_cache():
+  return get_cache("semrush", ttl=SEMRUSH_CACHE_TTL, max_entries=SEMRUSH_CACHE_MAX_ENTRIES)
+
+
+def fetch_traffic_rows(endpoint, payload):
+  """Rows of a traffic analytics endpoint, served from the SEMrush cache when possible."""
+  cache = get_semrush_cache()
+  cache_key = ("POST", endpoint, payload)
+  rows = cache.get(cache_key)
+  if rows is None:
+    with trace_span("tool", "semrush:" + endpoint):
+      rows = get_client().traffic_analytics(endpoint, payload)['data']['rows']
+    cache.set(cache_key, rows)
+  return rows
+
+
+async def afetch_traffic_rows(endpoint, payload):
+  """fetch_traffic_rows() on a worker thread, keeping the caller's tracer."""
+  context = contextvars.copy_context()
+  return await asyncio.to_thread(context.run, fetch_traffic_rows, endpoint, payload)
+
+
+async def afetch_traffic_rows_many(endpoint, payloads, concurrency=SEMRUSH_CONCURRENCY):
+  """
+  Fetches `payloads` concurrently, at most `concurrency` at a time and under
+  the shared client's rate limit. Returns one (rows, error) pair per payload,
+  in order, so one failing target does not lose the others.
+  """
+  semaphore = asyncio.Semaphore(concurrency)
+
+  async def one(payload):
+    async with semaphore:
+      try:
+        return await afetch_traffic_rows(endpoint, payload), None
+      except Exception as e:
+        return None, e
+
+  return await asyncio.gather(*(one(payload) for payload in payloads))
+
+
+def fetch_traffic_rows_many(endpoint, payloads, concurrency=SEMRUSH_CONCURRENCY):
+  """Blocking afetch_traffic_rows_many() for callers without an event loop."""
+  return asyncio.run(afetch_traffic_rows_many(endpoint, payloads, concurrency))
@@ -0,0 +1,88 @@
+# Column codes of the SEMrush analytics reports and the record attribute each maps to
+COLUMN_FIELDS = {
+  "Ph": "phrase",
+  "Nq": "volume",
+  "Nr": "results",
+  "Td": "trend",
+  "Rr": "relevance",
+  "Cp": "cpc",
+  "Co": "competition",
+  "Kd": "difficulty",
+}
+
+# The one ERROR body SEMrush answers with for a query that has no rows
+NOTHING_FOUND = "ERROR 50 ::"
+
+_INT_COLUMNS = {"Nq", "Nr"}
+_FLOAT_COLUMNS = {"Rr", "Cp", "Co", "Kd"}
+
+
+class SemrushError(RuntimeError):
+  """An "ERROR <code> :: <message>" body returned instead of a report."""
+
+
+def parse_value(code, text):
+  text = text.strip()
+  if code in _INT_COLUMNS:
+    return int(text) if text else 0
+  if code in _FLOAT_COLUMNS:
+    return float(text) if text else None
+  if code == "Td":
+    return tuple(float(v) for v in text.split(",") if v)
+  return text
+
+
+class KeywordRecord:
+  """One row of a phrase report as typed values (ints for Nq/Nr, a float tuple for Td)."""
+
+  __slots__ = tuple(COLUMN_FIELDS.values())
+
+  def __init__(self, **values):
+    for field in self.__slots__:
+      setattr(self, field, values.get(field))
+
+  @classmethod
+  def from_values(cls, columns, values):
+    record = cls()
+    for code, value in zip(columns, values):
+      # Cached rows come back from JSON with the trend as a list
+      if isinstance(value, list):
+        value = tuple(value)
+      setattr(record, COLUMN_FIELDS[code], value)
+    return record
+
+  def values(self, columns):
+    """Values in `columns` order, JSON-serialisable (the trend becomes a list)."""
+    values = [getattr(self, COLUMN_FIELDS[code]) for code in columns]
+    return [list(v) if isinstance(v, tuple) else v for v in values]
+
+  @property
+  def trend_text(self):
+    return ",".join(f"{v:g}" for v in self.trend or ())
+
+  def __getitem__(self, code):
+    return getattr(self, COLUMN_FIELDS[code])
+
+  def __repr__(self):
+    fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__ if getattr(self, f) is not None)
+    return f"KeywordRecord({fields})"
+
+
+def iter_rows(lines, columns):
+  """
+  Parses the ';'-separated lines of a SEMrush report into lists of typed
+  values in `columns` order. The header row is skipped, and an "ERROR 50 ::
+  NOTHING FOUND" body yields nothing. Any other ERROR body (exhausted API
+  units, a bad key, ...) raises SemrushError.
+  """
+  lines = iter(lines)
+  header = next(lines, None)
+  if header is None or header.startswith(NOTHING_FOUND):
+    return
+  if header.startswith("ERROR"):
+    raise SemrushError(header.strip())
+  for line in lines:
+    if not line:
+      continue
+    cells = line.split(";")
+    yield [parse_value(code, cell) for code, cell in zip(columns, cells)]
@@ -0,0 +1,139 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from tools.semrush_client import get_client, get_semrush_cache
+from tools.semrush_parser import KeywordRecord, iter_rows
+from tools.tracing import trace_span
+
+# Report types fetched up front for every brief. Add an entry here to have it
+# prefetched alongside the others.
+SEMRUSH_REPORTS = {
+  "related_keywords": {
+    "type": "phrase_related",
+    "export_columns": "Ph,Nq,Nr,Td,Rr",
+    # Pulled in bulk for clustering; only cluster summaries reach the prompts
+    "display_limit": int(os.getenv("SEMRUSH_RELATED_LIMIT", 1000)),
+  },
+  "qa": {
+    "type": "phrase_questions",
+    "export_columns": "Ph,Nq,Nr,Td",
+  },
+}
+
+DEFAULT_TIMEOUT = None  # use the client's configured timeout
+DEFAULT_DISPLAY_LIMIT = 10
+DEFAULT_FILTER = "+|Nq|Lt|1000"
+PAGE_SIZE = 1000
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="semrush-prefetch")
+
+
+def _fetch_page(client, params, columns, timeout):
+  cache = get_semrush_cache()
+  cache_key = (
+    "rows", params["type"], params["phrase"], params["database"], params["export_columns"],
+    params["display_filter"], params["display_offset"], params["display_limit"],
+  )
+  rows = cache.get(cache_key)
+  if rows is not None:
+    with trace_span("tool", f"semrush:{params['type']}", cache_hit=True):
+      return rows
+  with trace_span("tool", f"semrush:{params['type']}"):
+    response = client.report(params, timeout=timeout, stream=True)
+    response.encoding = response.encoding or "utf-8"
+    with response:
+      rows = list(iter_rows(response.iter_lines(decode_unicode=True), columns))
+  cache.set(cache_key, [[list(v) if isinstance(v, tuple) else v for v in row] for row in rows])
+  return rows
+
+
+def iter_report(api_key, report, phrase, lang, limit=None, page_size=PAGE_SIZE, timeout=DEFAULT_TIMEOUT, client=None):
+  """
+  Yields KeywordRecords for up to `limit` rows of `report`, fetching
+  `page_size` rows at a time via display_offset. Each page is parsed from
+  the streamed response and cached whole; records of a page are yielded
+  before the next page is requested.
+  """
+  spec = SEMRUSH_REPORTS[report]
+  columns = spec["export_columns"].split(",")
+  limit = limit or spec.get("display_limit", DEFAULT_DISPLAY_LIMIT)
+  client = client or get_client()
+  offset = 0
+  while offset < limit:
+    size = min(page_size, limit - offset)
+    params = {
+      "type": spec["type"],
+      "key": api_key,
+      "phrase": phrase,
+      "export_columns": spec["export_columns"],
+      "database": lang,
+      "display_limit": size,
+      "display_offset": offset,
+      "display_sort": "nq_desc",
+      "display_filter": spec.get("display_filter", DEFAULT_FILTER),
+    }
+    page = _fetch_page(client, params, columns, timeout)
+    for values in page:
+      yield KeywordRecord.from_values(columns, values)
+    if len(page) < size:
+      return
+    offset += size
+
+
+def fetch_report(api_key, report, phrase, lang, timeout=DEFAULT_TIMEOUT, client=None, limit=None):
+  return list(iter_report(api_key, report, phrase, lang, limit=limit, timeout=timeout, client=client))
+
+
+def fetch_related_keywords(api_key, phrase, lang, timeout=DEFAULT_TIMEOUT):
+  return fetch_report(api_key, "related_keywords", phrase, lang, timeout=timeout)
+
+
+def fetch_qa(api_key, phrase, lang, timeout=DEFAULT_TIMEOUT):
+  return fetch_report(api_key, "qa", phrase, lang, timeout=timeout)
+
+
+class SemrushPrefetch:
+  """
+  Fetches several SEMrush reports concurrently through the shared client.
+
+  Call start() as early as possible and results() once the data is needed;
+  work done in between overlaps with the HTTP round-trips.
+  """
+
+  def __init__(self, api_key, phrase, lang, reports=None, timeout=DEFAULT_TIMEOUT):
+    self.api_key = api_key
+    self.phrase = phrase
+    self.lang = lang
+    self.reports = list(reports or SEMRUSH_REPORTS)
+    self.timeout = timeout
+    self.futures = {}
+
+  def start(self):
+    client = get_client()
+    for report in self.reports:
+      # Run in a copy of the caller's context so tracing follows the request
+      self.futures[report] = _executor.submit(
+        contextvars.copy_context().run, fetch_report, self.api_key, report, self.phrase, self.lang, self.timeout, client
+      )
+    return self
+
+  def results(self, deadline=None):
+    """
+    Returns (data, errors): data maps each report to its rows (empty on
+    failure) and errors maps failed reports to the exception raised.
+    """
+    if not self.futures:
+      self.start()
+    data, errors = {}, {}
+    for report, future in self.futures.items():
+      try:
+        data[report] = future.result(timeout=deadline)
+      except FutureTimeoutError as e:
+        future.cancel()
+        data[report] = []
+        errors[report] = e
+      except Exception as e:
+        data[report] = []
+        errors[report] = e
+    return data, errors
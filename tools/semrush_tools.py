@@ -1,113 +1,109 @@
-import requests
-import json
-import os
+import re
+
+from langchain.tools import StructuredTool
+
+from tools.compact import TOOL_OUTPUT_MAX_ROWS, compact_table, measure
+from tools.semrush_client import afetch_traffic_rows_many, fetch_traffic_rows_many
+
+# Upper bound on targets per tool call so one call cannot exhaust the API quota
+SEMRUSH_MAX_TARGETS = 20
+EXPORT_COLUMNS = ["target", "from_target", "display_date", "country", "traffic_share", "traffic", "channel"]
+
+_separators = re.compile(r"[,\n;]+")
+
+
+def parse_targets(targets):
+  """Splits the tool input into distinct targets, keeping their order."""
+  if isinstance(targets, str):
+    targets = _separators.split(targets)
+  seen = dict.fromkeys(t.strip() for t in targets if t and t.strip())
+  return list(seen)[:SEMRUSH_MAX_TARGETS]
+
+
+def traffic_payload(target):
+  return {
+    "target": target,
+    "device_type": "desktop",
+    "display_limit": 10,
+    "display_offset": 0,
+    "country": "us",
+    "sort_order": "traffic_share",
+    "traffic_channel": "referral",
+    "traffic_type": "organic",
+    "display_date": "2023-06-01",
+    "export_columns": ",".join(EXPORT_COLUMNS),
+  }
+
+
+def _verbose_table(title, targets, results):
+  """The previous one-field-per-line layout, kept as the TOOL_OUTPUT_MEASURE baseline."""
+  blocks = []
+  for rows, _ in results:
+    blocks += ["\n".join(str(v) for v in row) + "\n\n" for row in rows or ()]
+  return f"{title} for {', '.join(targets)}:\n\n" + "\n".join(blocks)
+
+
+def format_table(title, targets, results):
+  """
+  One compact table for all targets. Each target keeps its top rows (the
+  API sorts by traffic share); failed or empty targets are listed after it.
+  """
+  per_target = max(3, TOOL_OUTPUT_MAX_ROWS // max(len(targets), 1))
+  rows, notes, omitted = [], [], 0
+  for target, (result, error) in zip(targets, results):
+    if error is not None:
+      notes.append(f"{target}: error: {error}")
+    elif not result:
+      notes.append(f"{target}: no data")
+    else:
+      rows += result[:per_target]
+      omitted += max(len(result) - per_target, 0)
+  text = compact_table(EXPORT_COLUMNS, rows, title=f"{title} for {len(targets)} target(s):", max_rows=len(rows))
+  if omitted:
+    text += f"\n+{omitted} lower-share rows omitted (top {per_target} kept per target)"
+  if notes:
+    text += "\n" + "\n".join(notes)
+  return measure("semrush:" + title, text, lambda: _verbose_table(title, targets, results))
+
+
+def _traffic_tool(name, endpoint, title, description):
+  def run(targets: str) -> str:
+    targets = parse_targets(targets)
+    return format_table(title, targets, fetch_traffic_rows_many(endpoint, [traffic_payload(t) for t in targets]))
+
+  async def arun(targets: str) -> str:
+    targets = parse_targets(targets)
+    results = await afetch_traffic_rows_many(endpoint, [traffic_payload(t) for t in targets])
+    return format_table(title, targets, results)
+
+  return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=description)
 
-from langchain.tools import tool
-from langchain_community.document_loaders import WebBaseLoader
 
 class SemrushTools:
-  
-  @tool('semrush keyword research')
-  def semrush_keyword_research(query: str) -> str:
-    """
-    Use this tool to perform keyword research using Semrush.
-    """
-    return SemrushTools.sermush_keyword_research(query)
-  
-  @tool('semrush competitor analysis')
-  def semrush_competitor_analysis(query: str) -> str:
-    """
-    Use this tool to perform competitor analysis using Semrush.
-    """
-    return SemrushTools.sermush_competitor_analysis(query)
-    
-  @tool('semrush technical seo')
-  def semrush_technical_seo(query: str) -> str:
-    """
-    Use this tool to perform technical SEO analysis using Semrush.
-    """
-    return SemrushTools.sermush_technical_seo(query)
-    
-  def semrush_keyword_research(query):
-    url = "https://api.semrush.com/analytics/ta/api/v3/sources"
-    payload = json.dumps({
-      "target": query,
-      "device_type": "desktop",
-      "display_limit": 10,
-      "display_offset": 0,
-      "country": "us",
-      "sort_order": "traffic_share",
-      "traffic_channel": "referral",
-      "traffic_type": "organic",
-      "display_date": "2023-06-01",
-      "export_columns": "target,from_target,display_date,country,traffic_share,traffic,channel"
-    })
-    headers = {
-      'X-API-KEY': os.getenv("SEMRUSH_API_KEY"),
-      'Content-Type': 'application/json'
-    }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    results = response.json()['data']['rows']
-    
-    string = []
-    for result in results:
-      string.append(f"{result[0]}\n{result[1]}\n{result[2]}\n{result[3]}\n{result[4]}\n{result[5]}\n{result[6]}\n\n")
-      
-    return f"Keyword research results for '{query}':\n\n" + "\n".join(string)
-  
-  def semrush_competitor_analysis(query):
-    url = "https://api.semrush.com/analytics/ta/api/v3/competitors"
-    payload = json.dumps({
-      "target": query,
-      "device_type": "desktop",
-      "display_limit": 10,
-      "display_offset": 0,
-      "country": "us",
-      "sort_order": "traffic_share",
-      "traffic_channel": "referral",
-      "traffic_type": "organic",
-      "display_date": "2023-06-01",
-      "export_columns": "target,from_target,display_date,country,traffic_share,traffic,channel"
-    })
-    headers = {
-      'X-API-KEY': os.getenv("SEMRUSH_API_KEY"),
-      'Content-Type': 'application/json'
-    }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    results = response.json()['data']['rows']
-    
-    string = []
-    for result in results:
-      string.append(f"{result[0]}\n{result[1]}\n{result[2]}\n{result[3]}\n{result[4]}\n{result[5]}\n{result[6]}\n\n")
-      
-    return f"Competitor analysis results for '{query}':\n\n" + "\n".join(string)
-  
-  def semrush_technical_seo(query):
-    url = "https://api.semrush.com/analytics/ta/api/v3/technical-seo"
-    payload = json.dumps({
-      "target": query,
-      "device_type": "desktop",
-      "display_limit": 10,
-      "display_offset": 0,
-      "country": "us",
-      "sort_order": "traffic_share",
-      "traffic_channel": "referral",
-      "traffic_type": "organic",
-      "display_date": "2023-06-01",
-      "export_columns": "target,from_target,display_date,country,traffic_share,traffic,channel"
-    })
-    headers = {
-      'X-API-KEY': os.getenv("SEMRUSH_API_KEY"),
-      'Content-Type': 'application/json'
-    }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    results = response.json()['data']['rows']
-    
-    string = []
-    for result in results:
-      string.append(f"{result[0]}\n{result[1]}\n{result[2]}\n{result[3]}\n{result[4]}\n{result[5]}\n{result[6]}\n\n")
-      
-    return f"Technical SEO analysis results for '{query}':\n\n" + "\n".join(string)
-  
+  """
+  SEMrush traffic analytics tools. Each takes one or more targets (domains
+  or keywords, comma separated), fetches them concurrently under the shared
+  SEMrush rate limit and returns a single table.
+  """
+
+  semrush_keyword_research = _traffic_tool(
+    'semrush keyword research', "sources", "Keyword research results",
+    "Use this tool to perform keyword research using Semrush. "
+    "Input: one or more domains or keywords separated by commas.",
+  )
+
+  semrush_competitor_analysis = _traffic_tool(
+    'semrush competitor analysis', "competitors", "Competitor analysis results",
+    "Use this tool to perform competitor analysis using Semrush. "
+    "Input: one or more competitor domains separated by commas; analyze them all in one call.",
+  )
+
+  semrush_technical_seo = _traffic_tool(
+    'semrush technical seo', "technical-seo", "Technical SEO analysis results",
+    "Use this tool to perform technical SEO analysis using Semrush. "
+    "Input: one or more domains separated by commas.",
+  )
+
+
 if __name__ == "__main__":
-  print(SemrushTools.sermush_keyword_research("example.com"))
+  print(SemrushTools.semrush_keyword_research.run("example.com"))
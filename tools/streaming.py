@@ -0,0 +1,114 @@
+import contextvars
+from contextlib import contextmanager
+
+try:
+  from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+  BaseCallbackHandler = object
+
+# crewai's output parser takes everything after this marker as the task's answer
+FINAL_ANSWER = "Final Answer:"
+
+_current_stream = contextvars.ContextVar("current_stream", default=None)
+_current_task = contextvars.ContextVar("current_task", default=None)
+
+
+class AnswerStream:
+  """
+  Sends the final answers of one run's tasks to `on_token(task, text)` while
+  the chat models stream them.
+
+  Only the text after crewai's "Final Answer:" marker is forwarded, not the
+  agents' thoughts and tool calls. When a task starts a further answer (a
+  retry after a parsing error, or the manager answering after a co-worker)
+  `on_token(task, None)` comes first so the receiver can drop the old one.
+
+  A call belongs to the task set with `streaming_task()` in its context,
+  else to `self.task`, which hierarchical runs advance as tasks complete.
+  """
+
+  def __init__(self, on_token, task=None):
+    self.on_token = on_token
+    self.task = task
+    self._answered = set()
+
+  @contextmanager
+  def activate(self):
+    """Makes this stream receive the answers of the current thread/context."""
+    token = _current_stream.set(self)
+    try:
+      yield self
+    finally:
+      _current_stream.reset(token)
+
+  def current_task(self):
+    return _current_task.get() or self.task
+
+  def start_answer(self, task):
+    if task in self._answered:
+      self.on_token(task, None)
+    self._answered.add(task)
+
+
+@contextmanager
+def streaming_task(name):
+  """Attributes the LLM calls made in this context, and in copies of it, to task `name`."""
+  token = _current_task.set(name)
+  try:
+    yield
+  finally:
+    _current_task.reset(token)
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+  """
+  LangChain callback feeding streamed tokens to the active AnswerStream.
+  Models only emit tokens when built with streaming=True; cached responses
+  arrive whole and are only seen when their task completes.
+  """
+
+  def __init__(self):
+    self._calls = {}
+
+  def _start(self, run_id):
+    stream = _current_stream.get()
+    if stream is not None:
+      self._calls[run_id] = {
+        "stream": stream, "task": stream.current_task(), "text": "", "answering": False, "sent": False,
+      }
+
+  def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+    self._start(run_id)
+
+  def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+    self._start(run_id)
+
+  def on_llm_new_token(self, token, *, run_id, **kwargs):
+    call = self._calls.get(run_id)
+    if call is None or not token:
+      return
+    if not call["answering"]:
+      # The marker can be split over several tokens; only search the new tail
+      searched = max(len(call["text"]) - len(FINAL_ANSWER), 0)
+      call["text"] += token
+      index = call["text"].find(FINAL_ANSWER, searched)
+      if index < 0:
+        return
+      call["answering"] = True
+      call["stream"].start_answer(call["task"])
+      token = call["text"][index + len(FINAL_ANSWER):]
+    if not call["sent"]:
+      token = token.lstrip()
+      if not token:
+        return
+      call["sent"] = True
+    call["stream"].on_token(call["task"], token)
+
+  def on_llm_end(self, response, *, run_id, **kwargs):
+    self._calls.pop(run_id, None)
+
+  def on_llm_error(self, error, *, run_id, **kwargs):
+    self._calls.pop(run_id, None)
+
+
+streaming_callback = StreamingCallbackHandler()
@@ -0,0 +1,43 @@
+try:
+  import tiktoken
+except ImportError:
+  tiktoken = None
+
+_encodings = {}
+
+
+def _encoding(model):
+  if tiktoken is None:
+    return None
+  if model not in _encodings:
+    try:
+      try:
+        _encodings[model] = tiktoken.encoding_for_model(model or "gpt-4o")
+      except KeyError:
+        # Non-OpenAI models (Claude, Llama): cl100k is a close enough estimate
+        _encodings[model] = tiktoken.get_encoding("cl100k_base")
+    except OSError:
+      # The BPE files are downloaded on first use; offline, fall back to the estimate
+      _encodings[model] = None
+  return _encodings[model]
+
+
+def count_tokens(text, model=None):
+  """Token count of `text` for `model`; ~4 characters per token without tiktoken."""
+  encoding = _encoding(model)
+  if encoding is None:
+    return (len(text) + 3) // 4
+  return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, model=None, marker="\n[...truncated]"):
+  """Cuts `text` to at most `max_tokens` tokens, appending `marker` when it had to cut."""
+  encoding = _encoding(model)
+  if encoding is None:
+    if len(text) <= max_tokens * 4:
+      return text
+    return text[: max_tokens * 4] + marker
+  tokens = encoding.encode(text, disallowed_special=())
+  if len(tokens) <= max_tokens:
+    return text
+  return encoding.decode(tokens[:max_tokens]) + marker
@@ -0,0 +1,248 @@
+import contextvars
+import functools
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+  from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+  BaseCallbackHandler = object
+
+from tools.tokens import count_tokens
+
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+_thread_state = threading.local()
+_agent_role = re.compile(r"You are (.+?)\.")
+
+
+class Tracer:
+  """
+  Collects timing/token records for one brief run.
+
+  Every record has kind (llm/tool/task/stage/cache), name, agent, start, end and
+  latency, plus token, retry and cache fields where they apply. Records are
+  appended to `path` as JSONL as soon as they are made.
+  """
+
+  def __init__(self, path=None, run_id=None):
+    self.path = path
+    self.run_id = run_id
+    self.records = []
+    self._lock = threading.Lock()
+    self._task_mark = time.time()
+
+  @contextmanager
+  def activate(self):
+    """Makes this tracer receive the records of the current thread/context."""
+    token = _current_tracer.set(self)
+    self._task_mark = time.time()
+    _thread_state.agent = None
+    try:
+      yield self
+    finally:
+      _current_tracer.reset(token)
+
+  def record(self, kind, name, start, end, **fields):
+    entry = {
+      "run_id": self.run_id,
+      "kind": kind,
+      "name": name,
+      "agent": fields.pop("agent", None) or getattr(_thread_state, "agent", None),
+      "start": start,
+      "end": end,
+      "latency": end - start,
+    }
+    entry.update(fields)
+    with self._lock:
+      self.records.append(entry)
+      if self.path:
+        with open(self.path, "a", encoding="utf-8") as f:
+          f.write(json.dumps(entry, default=str) + "\n")
+    return entry
+
+  @contextmanager
+  def span(self, kind, name, **fields):
+    start = time.time()
+    error = None
+    try:
+      yield
+    except Exception as e:
+      error = repr(e)
+      raise
+    finally:
+      if error:
+        fields["error"] = error
+      self.record(kind, name, start, time.time(), **fields)
+
+  def task_callback(self, name):
+    """
+    Returns a crewai Task callback recording the task's duration. crewai
+    only reports task completion, so a task is timed from the end of the
+    previous task (or run start) to its own completion.
+    """
+    def callback(output):
+      now = time.time()
+      with self._lock:
+        start, self._task_mark = self._task_mark, now
+      self.record("task", name, start, now, output_chars=len(str(getattr(output, "raw_output", output))))
+    return callback
+
+  def summary(self):
+    """Aggregates records by (kind, name, agent), slowest first."""
+    groups = {}
+    for r in self.records:
+      key = (r["kind"], r["name"], r["agent"])
+      g = groups.setdefault(key, {
+        "kind": r["kind"], "name": r["name"], "agent": r["agent"], "calls": 0, "total_s": 0.0,
+        "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "cache_hits": 0, "errors": 0,
+        "tokens_saved": 0,
+      })
+      g["calls"] += 1
+      g["total_s"] += r["latency"]
+      g["prompt_tokens"] += r.get("prompt_tokens") or 0
+      g["completion_tokens"] += r.get("completion_tokens") or 0
+      g["retries"] += r.get("retries") or 0
+      g["cache_hits"] += 1 if r.get("cache_hit") else 0
+      g["errors"] += 1 if r.get("error") else 0
+      g["tokens_saved"] += r.get("tokens_saved") or 0
+    rows = sorted(groups.values(), key=lambda g: g["total_s"], reverse=True)
+    for g in rows:
+      g["mean_s"] = g["total_s"] / g["calls"]
+    return rows
+
+
+def current_tracer():
+  return _current_tracer.get()
+
+
+@contextmanager
+def trace_span(kind, name, **fields):
+  """Records a span on the active tracer; does nothing when none is active."""
+  tracer = _current_tracer.get()
+  if tracer is None:
+    yield
+    return
+  with tracer.span(kind, name, **fields):
+    yield
+
+
+def mark_cache_hit():
+  """Called by caches so the surrounding LLM record is flagged as a hit."""
+  _thread_state.cache_hit = True
+
+
+def instrument_tool(tool, name=None):
+  """
+  Wraps a crewai or LangChain tool's _run so each call is recorded on the
+  active tracer. Must be applied before Agents are built from the tool.
+  """
+  if getattr(tool, "_traced", False):
+    return tool
+  name = name or tool.name
+  original = tool._run
+
+  @functools.wraps(original)
+  def _run(*args, **kwargs):
+    with trace_span("tool", name):
+      return original(*args, **kwargs)
+
+  # BaseTool is a pydantic model; bypass its attribute validation
+  object.__setattr__(tool, "_run", _run)
+  object.__setattr__(tool, "_traced", True)
+  return tool
+
+
+def _token_usage(response):
+  for generations in response.generations:
+    for generation in generations:
+      usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+      if usage:
+        return usage.get("input_tokens"), usage.get("output_tokens")
+  output = response.llm_output or {}
+  usage = output.get("token_usage") or output.get("usage") or {}
+  return (
+    usage.get("prompt_tokens", usage.get("input_tokens")),
+    usage.get("completion_tokens", usage.get("output_tokens")),
+  )
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+  """
+  LangChain callback that turns every chat model call into an "llm" record
+  on the active tracer. The calling agent is read from crewai's
+  "You are <role>." system prompt and remembered for the tool calls that
+  follow on the same thread. Streamed responses carry no usage, so their
+  tokens are counted locally and flagged as estimated.
+  """
+
+  def __init__(self):
+    self._calls = {}
+
+  def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+    agent = None
+    for message in (messages[0] if messages else []):
+      match = _agent_role.search(str(message.content))
+      if match:
+        agent = match.group(1)
+        break
+    if agent:
+      _thread_state.agent = agent
+    _thread_state.cache_hit = False
+    model = (kwargs.get("invocation_params") or {}).get("model") or (kwargs.get("invocation_params") or {}).get("model_name")
+    self._calls[run_id] = {
+      "start": time.time(), "agent": agent, "model": model, "retries": 0, "prompt": messages, "streamed": 0,
+    }
+
+  def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+    _thread_state.cache_hit = False
+    self._calls[run_id] = {
+      "start": time.time(), "agent": None, "model": None, "retries": 0, "prompt": None, "streamed": 0,
+    }
+
+  def on_llm_new_token(self, token, *, run_id, **kwargs):
+    call = self._calls.get(run_id)
+    if call is not None:
+      call["streamed"] += 1
+
+  def on_retry(self, retry_state, *, run_id, **kwargs):
+    call = self._calls.get(run_id)
+    if call is not None:
+      call["retries"] += 1
+
+  def on_llm_end(self, response, *, run_id, **kwargs):
+    call = self._calls.pop(run_id, None)
+    tracer = _current_tracer.get()
+    if call is None or tracer is None:
+      return
+    prompt_tokens, completion_tokens = _token_usage(response)
+    estimated = call["streamed"] and (prompt_tokens is None or completion_tokens is None)
+    if estimated:
+      if prompt_tokens is None and call["prompt"]:
+        prompt_tokens = count_tokens("\n".join(str(m.content) for m in call["prompt"][0]), call["model"])
+      if completion_tokens is None:
+        completion_tokens = call["streamed"]
+    tracer.record(
+      "llm", call["model"] or "llm", call["start"], time.time(),
+      agent=call["agent"],
+      prompt_tokens=prompt_tokens,
+      completion_tokens=completion_tokens,
+      retries=call["retries"],
+      cache_hit=getattr(_thread_state, "cache_hit", False),
+      tokens_estimated=bool(estimated),
+    )
+
+  def on_llm_error(self, error, *, run_id, **kwargs):
+    call = self._calls.pop(run_id, None)
+    tracer = _current_tracer.get()
+    if call is None or tracer is None:
+      return
+    tracer.record(
+      "llm", call["model"] or "llm", call["start"], time.time(),
+      agent=call["agent"], retries=call["retries"], error=repr(error),
+    )
+
+
+tracing_callback = TracingCallbackHandler()
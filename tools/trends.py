@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from langchain_core.tools import BaseTool
+
+from tools.compact import compact_table, measure
+from tools.disk_cache import get_cache
+from tools.tracing import trace_span
+
+# Google Trends compares at most five terms per request
+TRENDS_BATCH_LIMIT = 5
+TRENDS_CACHE_TTL = int(os.getenv("TRENDS_CACHE_TTL", 24 * 3600))
+# Five years of weekly points: enough for year-over-year and seasonality
+TRENDS_TIMEFRAME = os.getenv("TRENDS_TIMEFRAME", "today 5-y")
+TRENDS_GEO = os.getenv("TRENDS_GEO", "")
+
+SUMMARY_COLUMNS = ["keyword", "slope_%/yr", "yoy_%", "peak_month", "seasonality_%", "latest_vs_mean_%"]
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+_YEAR = 365.25 * 24 * 3600
+
+
+def normalize_keyword(keyword):
+  return " ".join(keyword.lower().split())
+
+
+def summarize_series(timestamps, values):
+  """
+  Scale-free summary of one interest-over-time series. Values within a
+  comparison request are relative to the batch's peak, so a raw value
+  depends on which keywords were fetched together; every figure is
+  therefore a ratio within the series itself:
+
+  - slope: least-squares trend in % of the mean per year
+  - yoy: mean of the last 12 months vs the 12 months before, in %
+  - peak_month / seasonality: month with the highest average interest and
+    how far the monthly averages spread, in % of the mean
+  - latest_vs_mean: the latest point vs the series mean, in %
+  """
+  t = np.asarray(timestamps, dtype=float)
+  v = np.asarray(values, dtype=float)
+  if v.size < 2 or not v.any():
+    return None
+  mean = v.mean()
+  years = (t - t[0]) / _YEAR
+  slope = np.polyfit(years, v, 1)[0] if np.ptp(years) > 0 else 0.0
+  summary = {
+    "slope_%/yr": round(100 * slope / mean, 1),
+    "yoy_%": None,
+    "peak_month": None,
+    "seasonality_%": None,
+    "latest_vs_mean_%": round(100 * (float(v[-1]) / mean - 1), 1),
+  }
+  last_year = t >= t[-1] - _YEAR
+  year_before = (t >= t[-1] - 2 * _YEAR) & ~last_year
+  if year_before.any() and v[year_before].mean() > 0:
+    summary["yoy_%"] = round(100 * (v[last_year].mean() / v[year_before].mean() - 1), 1)
+  months = np.array([datetime.fromtimestamp(ts, timezone.utc).month for ts in t]) - 1
+  counts = np.bincount(months, minlength=12)
+  if (counts > 0).sum() == 12:
+    monthly = np.bincount(months, weights=v, minlength=12) / counts
+    summary["peak_month"] = _MONTHS[int(monthly.argmax())]
+    summary["seasonality_%"] = round(100 * float(np.ptp(monthly)) / mean, 1)
+  return summary
+
+
+class TrendsService:
+  """
+  Google Trends interest-over-time through SerpApi, fetched in comparison
+  batches of up to TRENDS_BATCH_LIMIT keywords and cached per keyword.
+
+  The cache holds the raw (timestamp, value) series; callers get NumPy
+  summaries, so agents see a few numbers per keyword instead of the series.
+  """
+
+  def __init__(self, api_key=None, timeframe=TRENDS_TIMEFRAME, geo=TRENDS_GEO, cache=None, client_factory=None):
+    self.api_key = api_key
+    self.timeframe = timeframe
+    self.geo = geo
+    self.cache = cache or get_cache("trends", ttl=TRENDS_CACHE_TTL, max_entries=20000)
+    self._client_factory = client_factory
+    # Agents often ask for the same keyword at once; fetch each batch only once
+    self._lock = threading.Lock()
+
+  @property
+  def key(self):
+    return self.api_key or os.getenv("SERPAPI_API_KEY")
+
+  def _cache_key(self, keyword):
+    return ("series", normalize_keyword(keyword), self.timeframe, self.geo)
+
+  def _fetch_batch(self, keywords):
+    if self._client_factory is None:
+      from serpapi import SerpApiClient
+      self._client_factory = SerpApiClient
+    params = {
+      "engine": "google_trends",
+      "api_key": self.key,
+      "q": ",".join(keywords),
+      "date": self.timeframe,
+      "data_type": "TIMESERIES",
+    }
+    if self.geo:
+      params["geo"] = self.geo
+    with trace_span("tool", "trends:fetch", keywords=len(keywords)):
+      result = self._client_factory(params).get_dict()
+    if "error" in result:
+      raise RuntimeError(f"Google Trends error: {result['error']}")
+    timeline = (result.get("interest_over_time") or {}).get("timeline_data") or []
+    series = {normalize_keyword(k): ([], []) for k in keywords}
+    for point in timeline:
+      timestamp = int(point["timestamp"])
+      for value in point.get("values", []):
+        entry = series.get(normalize_keyword(value.get("query", "")))
+        if entry is not None:
+          entry[0].append(timestamp)
+          entry[1].append(value.get("extracted_value") or 0)
+    return series
+
+  def series(self, keywords):
+    """{keyword: (timestamps, values)} for `keywords`, fetching only what is not cached."""
+    found = {}
+    missing = []
+    for keyword in dict.fromkeys(keywords):
+      cached = self.cache.get(self._cache_key(keyword))
+      if cached is None:
+        missing.append(keyword)
+      else:
+        found[keyword] = cached
+    if missing:
+      with self._lock:
+        for start in range(0, len(missing), TRENDS_BATCH_LIMIT):
+          batch = missing[start:start + TRENDS_BATCH_LIMIT]
+          # Another thread may have fetched these while we waited for the lock
+          pending = [k for k in batch if self.cache.get(self._cache_key(k)) is None]
+          fetched = self._fetch_batch(pending) if pending else {}
+          for keyword in batch:
+            data = fetched.get(normalize_keyword(keyword))
+            if data is not None:
+              self.cache.set(self._cache_key(keyword), data)
+            else:
+              data = self.cache.get(self._cache_key(keyword))
+            found[keyword] = data
+    return found
+
+  def summaries(self, keywords):
+    """{keyword: summary dict or None when Trends has no data}."""
+    return {k: summarize_series(*data) if data else None for k, data in self.series(keywords).items()}
+
+  def prefetch(self, keywords):
+    """Warms the cache in the background; errors are left for the tool call to report."""
+    def run():
+      try:
+        self.series(keywords)
+      except Exception:
+        pass
+
+    thread = threading.Thread(target=run, name="trends-prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+def _verbose_series(keyword, data):
+  """The per-keyword layout of GoogleTrendsQueryRun, used as the measurement baseline."""
+  timestamps, values = data or ([], [])
+  if not values:
+    return f"Query: {keyword}\nNo good Trend Result was found"
+  return (
+    f"Query: {keyword}\nDate From: {time.strftime('%b %d, %Y', time.gmtime(timestamps[0]))}\n"
+    f"Date To: {time.strftime('%b %d, %Y', time.gmtime(timestamps[-1]))}\n"
+    f"Min Value: {min(values)}\nMax Value: {max(values)}\nAverage Value: {sum(values) / len(values)}\n"
+    f"Trend values: {', '.join(str(v) for v in values)}"
+  )
+
+
+class GoogleTrendsTool(BaseTool):
+  """Drop-in replacement for GoogleTrendsQueryRun backed by a shared TrendsService."""
+
+  name: str = "google_trends"
+  description: str = (
+    "Google Trends interest over the last five years. Input: one or more keywords separated by commas "
+    "(compare up to five at once). Returns per keyword the trend slope and year-over-year change in %, "
+    "the seasonal peak month and seasonal swing in %, and the latest interest vs its five-year mean in %."
+  )
+  service: TrendsService
+
+  class Config:
+    arbitrary_types_allowed = True
+
+  def _run(self, query, run_manager=None):
+    keywords = [k.strip() for k in query.split(",") if k.strip()]
+    series = self.service.series(keywords)
+    rows = []
+    for keyword in keywords:
+      summary = summarize_series(*series[keyword]) if series.get(keyword) else None
+      if summary is None:
+        rows.append([keyword] + ["no data"] + [None] * (len(SUMMARY_COLUMNS) - 2))
+      else:
+        rows.append([keyword] + [summary[c] for c in SUMMARY_COLUMNS[1:]])
+    text = compact_table(SUMMARY_COLUMNS, rows, title="Google Trends summary:", max_rows=len(rows))
+    return measure("trends", text, lambda: "\n\n".join(_verbose_series(k, series.get(k)) for k in keywords))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_trends_service():
+  """Returns the process-wide TrendsService shared by all agents and workers."""
+  global _service
+  with _service_lock:
+    if _service is None:
+      _service = TrendsService()
+    return _service
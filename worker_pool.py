@@ -0,0 +1,251 @@
+"""
+Pool of worker processes that each run one brief at a time.
+
+Every brief runs in its own interpreter with its stdout captured per job, so
+concurrent users of one Streamlit server no longer share (and corrupt) the
+global sys.stdout, and N briefs can use N cores. Log lines, progress, the
+streamed task answers and the final result come back to the parent over a
+single multiprocessing queue and are routed to the `BriefJob` that submitted
+them.
+"""
+import collections
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+from dotenv import load_dotenv
+
+from job_queue import job_log_path, run_brief
+
+POOL_WORKERS = int(os.getenv("POOL_WORKERS", os.cpu_count() or 2))
+# Seconds between checks for workers that died
+REAP_INTERVAL = float(os.getenv("POOL_REAP_INTERVAL", 1.0))
+
+
+class _JobLog:
+    """stdout replacement in the worker: writes the job's log file and forwards each chunk to the parent."""
+
+    def __init__(self, job_id, events, log_path):
+        self.job_id = job_id
+        self.events = events
+        self._file = open(log_path, "a", encoding="utf-8")
+
+    def write(self, data):
+        self._file.write(data)
+        if data:
+            self.events.put(("log", self.job_id, data))
+        return len(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _job_callbacks(job_id, put):
+    """The run_brief() callbacks of one job, each turned into an event passed to `put(kind, job_id, payload)`."""
+    return {
+        "on_progress": lambda stage: put("progress", job_id, stage),
+        "on_semrush_error": lambda report, err: put("semrush_error", job_id, (report, str(err))),
+        "on_token": lambda task, text: put("token", job_id, (task, text)),
+        "on_task_done": lambda task, output: put("task_done", job_id, (task, output)),
+    }
+
+
+def _worker_main(tasks, events):
+    load_dotenv()
+    pid = os.getpid()
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        job_id, params = task
+        events.put(("started", job_id, pid))
+        log = None
+        try:
+            log_path = job_log_path(job_id)
+            log = _JobLog(job_id, events, log_path)
+            result = run_brief(job_id, params, log, **_job_callbacks(job_id, lambda *event: events.put(event)))
+            result["log_path"] = log_path
+            events.put(("done", job_id, result))
+        except Exception:
+            events.put(("failed", job_id, traceback.format_exc()))
+        finally:
+            if log is not None:
+                log.close()
+
+
+class BriefJob:
+    """
+    Parent-side handle of one submitted brief; `events()` yields (kind,
+    payload) until it finishes. Kinds: started, log, progress, semrush_error,
+    token ((task, text)), task_done ((task, output)), then done or failed.
+    """
+
+    def __init__(self, job_id, params):
+        self.id = job_id
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self._events = queue.Queue()
+        self._finished = threading.Event()
+
+    def _deliver(self, kind, payload):
+        if kind == "done":
+            self.status, self.result = "done", payload
+        elif kind == "failed":
+            self.status, self.error = "failed", payload
+        elif kind == "started":
+            self.status = "running"
+        self._events.put((kind, payload))
+        if kind in ("done", "failed"):
+            self._finished.set()
+
+    def events(self, poll_interval=0.2):
+        """Yields events as they arrive, (None, None) while idle so callers can refresh the UI."""
+        while True:
+            try:
+                kind, payload = self._events.get(timeout=poll_interval)
+            except queue.Empty:
+                yield None, None
+                continue
+            yield kind, payload
+            if kind in ("done", "failed"):
+                return
+
+    def wait(self, timeout=None):
+        """Blocks until the job finishes and returns its result, raising RuntimeError on failure."""
+        self._finished.wait(timeout)
+        if self.status == "failed":
+            raise RuntimeError(self.error)
+        return self.result
+
+
+class _Worker:
+    """One pool process with its own task queue, and the id of the job it was handed, if any."""
+
+    def __init__(self, ctx, events):
+        self.tasks = ctx.Queue()
+        self.process = ctx.Process(target=_worker_main, args=(self.tasks, events), daemon=True)
+        self.process.start()
+        self.job_id = None
+
+
+class BriefWorkerPool:
+    """
+    `workers` long-lived processes, each handed one job at a time.
+
+    Engines are built lazily inside each worker and reused for its following
+    jobs. The parent records which worker a job went to when it hands it
+    over, so a worker that dies at any point fails its job; it is then
+    replaced. Workers are checked every REAP_INTERVAL seconds, however busy
+    the event queue is.
+    """
+
+    def __init__(self, workers=POOL_WORKERS):
+        # spawn: the parent runs Streamlit and crew threads that must not be forked
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._jobs = {}
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [_Worker(self._ctx, self._events) for _ in range(workers)]
+        self._dispatcher = threading.Thread(target=self._dispatch, name="brief-pool-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, params):
+        job = BriefJob(uuid.uuid4().hex[:12], params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._assign()
+        return job
+
+    def _assign(self):
+        """Hands pending jobs to idle workers; called with the lock held."""
+        for worker in self._workers:
+            if not self._pending:
+                return
+            if worker.job_id is None:
+                job = self._pending.popleft()
+                worker.job_id = job.id
+                worker.tasks.put((job.id, job.params))
+
+    def _dispatch(self):
+        next_reap = time.monotonic() + REAP_INTERVAL
+        while not self._closed:
+            try:
+                kind, job_id, payload = self._events.get(timeout=REAP_INTERVAL)
+            except queue.Empty:
+                kind = None
+            if kind is not None:
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                    if kind in ("done", "failed"):
+                        self._jobs.pop(job_id, None)
+                        for worker in self._workers:
+                            if worker.job_id == job_id:
+                                worker.job_id = None
+                        self._assign()
+                if job is not None:
+                    job._deliver(kind, payload)
+            if time.monotonic() >= next_reap:
+                self._reap()
+                next_reap = time.monotonic() + REAP_INTERVAL
+
+    def _reap(self):
+        """Fails the jobs of workers that died and starts replacements."""
+        with self._lock:
+            if self._closed:
+                return
+            dead = [worker for worker in self._workers if not worker.process.is_alive()]
+            if not dead:
+                return
+            lost = []
+            for worker in dead:
+                self._workers.remove(worker)
+                self._workers.append(_Worker(self._ctx, self._events))
+                if worker.job_id is not None:
+                    lost.append(self._jobs.pop(worker.job_id, None))
+            self._assign()
+        for job in lost:
+            if job is not None:
+                job._deliver("failed", "worker process exited unexpectedly")
+
+    def shutdown(self):
+        self._closed = True
+        for worker in self._workers:
+            worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+        # Let the dispatcher leave events.get() before the queue can be closed under it
+        self._dispatcher.join(timeout=2 * REAP_INTERVAL)
+
+
+def run_in_thread(job_id, params, log, engine=None):
+    """
+    Runs one brief on a thread of this process and returns its BriefJob, with
+    the same events as a pool job. Stdout goes to `log` for the whole process
+    meanwhile, so only one such job should run at a time.
+    """
+    job = BriefJob(job_id, params)
+
+    def run():
+        job._deliver("started", os.getpid())
+        try:
+            callbacks = _job_callbacks(job_id, lambda kind, _, payload: job._deliver(kind, payload))
+            result = run_brief(job_id, params, log, engine=engine, **callbacks)
+            result["log_path"] = getattr(log, "log_path", None)
+            job._deliver("done", result)
+        except Exception:
+            job._deliver("failed", traceback.format_exc())
+
+    threading.Thread(target=run, name=f"brief-{job_id}", daemon=True).start()
+    return job